@@ -3,57 +3,56 @@ from flask_admin import Admin, AdminIndexView, expose, BaseView
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.form import Select2Widget
 from flask_admin.model.template import macro
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload
 from app import app, db
-from models import Product, Order, OrderItem, StockMovement, Supplier, StockAlert
+from auth import is_admin_logged_in
+from dashboard import get_dashboard_stats
+from reports import rebuild_sales_day
+from models import Product, Order, OrderItem, StockMovement, Supplier
+from stock_service import StockAdjustmentError, apply_stock_adjustments
 from wtforms import TextAreaField, IntegerField, SelectField, StringField
 from wtforms.validators import NumberRange, DataRequired, Optional
 from wtforms.widgets import TextArea
 from markupsafe import Markup
-from datetime import datetime, timedelta
 import logging
 
-class SecureAdminIndexView(AdminIndexView):
+class SecureViewMixin:
+    """Restrict a Flask-Admin view to logged-in admins (same login as /admin)"""
+
+    def is_accessible(self):
+        return is_admin_logged_in()
+
+    def inaccessible_callback(self, name, **kwargs):
+        flash('Você precisa fazer login para acessar esta área.', 'warning')
+        return redirect('/admin/login')
+
+
+class SecureAdminIndexView(SecureViewMixin, AdminIndexView):
     """Custom admin index view with inventory dashboard"""
     
     @expose('/')
     def index(self):
-        # Basic statistics
-        total_products = Product.query.count()
-        products_in_stock = Product.query.filter(Product.stock_quantity > 0).count()
-        low_stock_products = Product.query.filter(Product.stock_quantity <= Product.min_stock_level).count()
-        out_of_stock = Product.query.filter(Product.stock_quantity == 0).count()
-        
-        # Order statistics
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status='pending').count()
+        # Product and order totals come from one cached aggregate query
+        stats = get_dashboard_stats()
         
-        # Stock value calculation
-        total_stock_value = db.session.query(db.func.sum(Product.stock_quantity * Product.cost_price)).scalar() or 0
-        total_retail_value = db.session.query(db.func.sum(Product.stock_quantity * Product.price)).scalar() or 0
-        
-        # Recent stock movements
-        recent_movements = StockMovement.query.order_by(StockMovement.created_at.desc()).limit(5).all()
+        # Recent stock movements (product names in the same query)
+        recent_movements = StockMovement.query.options(joinedload(StockMovement.product)) \
+                                              .order_by(StockMovement.created_at.desc()).limit(5).all()
         
         # Low stock alerts
         low_stock_alerts = Product.query.filter(Product.stock_quantity <= Product.min_stock_level).limit(10).all()
         
         try:
             return self.render('admin/index.html', 
-                             total_products=total_products,
-                             products_in_stock=products_in_stock,
-                             low_stock_products=low_stock_products,
-                             out_of_stock=out_of_stock,
-                             total_orders=total_orders,
-                             pending_orders=pending_orders,
-                             total_stock_value=total_stock_value,
-                             total_retail_value=total_retail_value,
                              recent_movements=recent_movements,
-                             low_stock_alerts=low_stock_alerts)
+                             low_stock_alerts=low_stock_alerts,
+                             **stats)
         except Exception as e:
             logging.error(f"Erro ao carregar admin dashboard: {e}")
             return f"<h1>Dashboard Admin - Visage</h1><p>Erro: {str(e)}</p>"
 
-class InventoryManagementView(BaseView):
+class InventoryManagementView(SecureViewMixin, BaseView):
     """
     Custom view for inventory management operations.
     
@@ -107,33 +106,18 @@ class InventoryManagementView(BaseView):
                     products = Product.query.order_by(Product.name).all()
                     return self.render('admin/adjust_stock.html', products=products)
                 
-                old_quantity = product.stock_quantity
-                
-                # Prevent negative stock
-                if old_quantity + quantity_change < 0:
-                    flash(f'Erro: Quantidade insuficiente. O produto {product.name} possui apenas {old_quantity} unidades em estoque.', 'error')
+                # Same path as the batch adjustment: one UPDATE, movement and alerts in one commit
+                try:
+                    movement = apply_stock_adjustments([(1, str(product.id), quantity_change, reason)])[0]
+                except StockAdjustmentError as e:
+                    # Estoque insuficiente ou motivo longo demais
+                    flash(f'Erro: {e.errors[0][1]}.', 'error')
                 else:
-                    # Create the movement record with full details
-                    movement_type = 'increase' if quantity_change > 0 else 'decrease'
-                    
-                    # Use the product's method to update stock and create movement
-                    movement = product.update_stock(quantity_change, reason)
-                    if movement:
-                        movement.created_by = 'Admin'
-                        movement.movement_type = movement_type  # Ensure correct movement type
-                        db.session.add(movement)
-                        db.session.commit()
-                        
-                        # Handle stock alerts creation/resolution
-                        self._manage_stock_alerts(product)
-                        
-                        # Provide detailed success message
-                        if quantity_change > 0:
-                            flash(f'Estoque do produto {product.name} aumentado em {quantity_change} unidades. Novo estoque: {product.stock_quantity}', 'success')
-                        else:
-                            flash(f'Estoque do produto {product.name} reduzido em {abs(quantity_change)} unidades. Novo estoque: {product.stock_quantity}', 'success')
+                    # Provide detailed success message
+                    if quantity_change > 0:
+                        flash(f'Estoque do produto {product.name} aumentado em {quantity_change} unidades. Novo estoque: {movement["new_quantity"]}', 'success')
                     else:
-                        flash('Erro ao criar registro de movimentação.', 'error')
+                        flash(f'Estoque do produto {product.name} reduzido em {abs(quantity_change)} unidades. Novo estoque: {movement["new_quantity"]}', 'success')
             except Exception as e:
                 import traceback
                 error_details = traceback.format_exc()
@@ -144,50 +128,8 @@ class InventoryManagementView(BaseView):
         # Get products sorted by name for better UX
         products = Product.query.order_by(Product.name).all()
         return self.render('admin/adjust_stock.html', products=products)
-    
-    def _manage_stock_alerts(self, product):
-        """
-        Create or resolve stock alerts based on product stock levels
-        
-        Args:
-            product: The Product instance to check
-        """
-        try:
-            # Check if we need to create a stock alert
-            if product.stock_quantity <= product.min_stock_level:
-                # Check if alert already exists
-                existing_alert = StockAlert.query.filter_by(
-                    product_id=product.id, 
-                    is_resolved=False
-                ).first()
-                
-                if not existing_alert:
-                    # Create new alert
-                    alert = StockAlert(
-                        product_id=product.id,
-                        alert_type='low_stock' if product.stock_quantity > 0 else 'out_of_stock',
-                        message=f'Estoque abaixo do nível mínimo ({product.min_stock_level})',
-                        is_resolved=False
-                    )
-                    db.session.add(alert)
-            else:
-                # Resolve any existing alerts for this product
-                StockAlert.query.filter_by(
-                    product_id=product.id, 
-                    is_resolved=False
-                ).update({
-                    'is_resolved': True,
-                    'resolved_at': datetime.now(),
-                    'resolution_note': 'Estoque normalizado'
-                })
-            
-            db.session.commit()
-        except Exception as e:
-            logging.error(f"Erro ao gerenciar alertas: {str(e)}")
-            # We don't raise the exception here to avoid breaking the main flow
-            # if alert management fails
 
-class ProductAdminView(ModelView):
+class ProductAdminView(SecureViewMixin, ModelView):
     """Admin básico e funcional para produtos"""
     
     # Configuração básica para funcionamento
@@ -214,9 +156,9 @@ class ProductAdminView(ModelView):
     }
     
     # Campos do formulário sem problemas
-    form_excluded_columns = ['created_at', 'updated_at']
+    form_excluded_columns = ['created_at', 'updated_at', 'image_data', 'image_hash', 'image_size', 'image_variants']
 
-class StockMovementAdminView(ModelView):
+class StockMovementAdminView(SecureViewMixin, ModelView):
     """Admin básico para movimentações"""
     
     can_create = False
@@ -224,7 +166,9 @@ class StockMovementAdminView(ModelView):
     can_delete = False
     
     column_list = ('created_at', 'product', 'movement_type', 'quantity')
-    column_default_sort = ('created_at', True)
+    column_default_sort = [('created_at', True), ('id', True)]
+    # O log só cresce: sem COUNT(*) por página (navegação por cursor fica em /admin/movements)
+    simple_list_pager = True
     
     column_labels = {
         'created_at': 'Data',
@@ -233,7 +177,7 @@ class StockMovementAdminView(ModelView):
         'quantity': 'Quantidade'
     }
 
-class SupplierAdminView(ModelView):
+class SupplierAdminView(SecureViewMixin, ModelView):
     """Admin básico para fornecedores"""
     
     column_list = ('name', 'contact_person', 'phone', 'is_active')
@@ -245,7 +189,7 @@ class SupplierAdminView(ModelView):
         'is_active': 'Ativo'
     }
 
-class OrderAdminView(ModelView):
+class OrderAdminView(SecureViewMixin, ModelView):
     """Admin básico para pedidos"""
     
     can_create = False
@@ -254,6 +198,8 @@ class OrderAdminView(ModelView):
     
     column_list = ('id', 'customer_name', 'total_amount', 'status', 'created_at')
     column_default_sort = ('created_at', True)
+    # Os itens não são editáveis aqui: salvar a lista vazia desvincularia os itens do pedido
+    form_excluded_columns = ['items']
     
     column_formatters = {
         'total_amount': lambda v, c, m, p: f'R$ {m.total_amount:.2f}' if m.total_amount else 'R$ 0,00'
@@ -267,12 +213,20 @@ class OrderAdminView(ModelView):
         'created_at': 'Data'
     }
 
-# Initialize Flask-Admin
+    def on_model_change(self, form, model, is_created):
+        # Status, total e data mudam o faturamento: refaz os dias afetados
+        # na mesma transação da edição, como em /admin/orders/edit
+        state = inspect(model)
+        if any(state.attrs[name].history.has_changes() for name in ('status', 'total_amount', 'created_at')):
+            for day in sorted({value.date() for value in state.attrs.created_at.history.sum() if value}):
+                rebuild_sales_day(day)
+
+# Initialize Flask-Admin (under /admin/painel, the custom CRUD owns /admin)
 admin = Admin(
     app, 
     name='Administração - Visage',
     template_mode='bootstrap4',
-    index_view=SecureAdminIndexView(name='Dashboard')
+    index_view=SecureAdminIndexView(name='Dashboard', url='/admin/painel')
 )
 
 # Add views
@@ -1,16 +1,26 @@
-from flask import render_template_string, request, redirect, url_for, flash, Blueprint, send_from_directory, render_template
+from flask import request, redirect, url_for, flash, Blueprint, send_from_directory, render_template, Response, stream_with_context, jsonify
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import joinedload
 from app import app, db
 from models import Product, Order, StockMovement, Supplier, OrderItem
 from forms import AdminLoginForm
 from auth import login_required, verify_password, login_admin, logout_admin, is_admin_logged_in
-from datetime import datetime
+from dashboard import get_dashboard_stats
+from pagination import keyset_paginate
+from reports import refresh_rollups, refresh_sales_rollup, get_sales_report
+from stock_service import StockAdjustmentError, REASON_MAX_LENGTH, parse_adjustment_lines, apply_stock_adjustments
+from product_import import import_products, is_xlsx_available
+from exports import EXPORTS, EXPORT_FORMATS, export_rows, stream_csv, stream_xlsx
+from datetime import datetime, timedelta
 import os
 import uuid
 
 # Criar blueprint para o admin
 admin_bp = Blueprint('admin_crud', __name__, url_prefix='/admin')
 
+# Linhas por página nas listagens do admin
+ADMIN_PAGE_SIZE = 20
+
 # Configuração para upload de imagens
 UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
@@ -59,245 +69,29 @@ def logout():
 @admin_bp.route('/')
 @login_required
 def index():
-    # Dashboard completo
-    total_products = Product.query.count()
-    total_orders = Order.query.count()
-    low_stock_products = Product.query.filter(Product.stock_quantity <= 5).count()
+    # Totais em cache (uma consulta agregada) + pedidos recentes
+    stats = get_dashboard_stats()
     recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Admin CRUD - Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav me-auto">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link" href="/admin/suppliers">Fornecedores</a>
-                    <a class="nav-link" href="/">Site</a>
-                </div>
-                <div class="navbar-nav">
-                    <a class="nav-link text-light" href="/admin/logout">
-                        <i class="fas fa-sign-out-alt"></i> Sair
-                    </a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <h1><i class="fas fa-tachometer-alt"></i> Dashboard</h1>
-            
-            <div class="row mt-4">
-                <div class="col-md-3">
-                    <div class="card bg-primary text-white">
-                        <div class="card-body text-center">
-                            <i class="fas fa-box fa-2x mb-2"></i>
-                            <h5>Produtos</h5>
-                            <h2>{{ total_products }}</h2>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-3">
-                    <div class="card bg-success text-white">
-                        <div class="card-body text-center">
-                            <i class="fas fa-shopping-cart fa-2x mb-2"></i>
-                            <h5>Pedidos</h5>
-                            <h2>{{ total_orders }}</h2>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-3">
-                    <div class="card bg-warning text-white">
-                        <div class="card-body text-center">
-                            <i class="fas fa-exclamation-triangle fa-2x mb-2"></i>
-                            <h5>Estoque Baixo</h5>
-                            <h2>{{ low_stock }}</h2>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-3">
-                    <div class="card bg-info text-white">
-                        <div class="card-body text-center">
-                            <i class="fas fa-chart-line fa-2x mb-2"></i>
-                            <h5>Vendas Hoje</h5>
-                            <h2>R$ 0</h2>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="row mt-5">
-                <div class="col-md-8">
-                    <h3>Ações Rápidas</h3>
-                    <div class="list-group">
-                        <a href="/admin/products/new" class="list-group-item list-group-item-action">
-                            <i class="fas fa-plus text-primary"></i> Adicionar Novo Produto
-                        </a>
-                        <a href="/admin/products" class="list-group-item list-group-item-action">
-                            <i class="fas fa-edit text-success"></i> Gerenciar Produtos
-                        </a>
-                        <a href="/admin/orders" class="list-group-item list-group-item-action">
-                            <i class="fas fa-list text-info"></i> Ver Todos os Pedidos
-                        </a>
-                        <a href="/admin/suppliers" class="list-group-item list-group-item-action">
-                            <i class="fas fa-truck text-warning"></i> Gerenciar Fornecedores
-                        </a>
-                    </div>
-                </div>
-                <div class="col-md-4">
-                    <h3>Pedidos Recentes</h3>
-                    <div class="list-group">
-                        {% for order in recent_orders %}
-                        <div class="list-group-item">
-                            <strong>#{{ order.id }}</strong> - {{ order.customer_name }}<br>
-                            <small class="text-muted">R$ {{ "%.2f"|format(order.total_amount) }}</small>
-                        </div>
-                        {% endfor %}
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, 
-                                total_products=total_products,
-                                total_orders=total_orders, 
-                                low_stock=low_stock_products,
-                                recent_orders=recent_orders)
+    return render_template('admin_crud/index.html',
+                           total_products=stats['total_products'],
+                           total_orders=stats['total_orders'],
+                           low_stock=stats['low_stock_products'],
+                           sales_today=stats['sales_today'],
+                           recent_orders=recent_orders)
 
 @admin_bp.route('/products')
 @login_required
 def products_list():
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    products = Product.query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False,
-        max_per_page=100
-    )
-    
-    # Construir HTML com Python puro
-    products_rows = ""
-    for product in products.items:
-        # Determinar cor do badge do estoque
-        if product.stock_quantity <= 5:
-            stock_badge_color = "danger"
-        elif product.stock_quantity <= 10:
-            stock_badge_color = "warning"
-        else:
-            stock_badge_color = "success"
-        
-        # Imagem do produto com tratamento para banco ou URL
-        image_html = ""
-        if product.image_data:
-            # Imagem do banco de dados
-            image_url = f'/product_image/{product.id}'
-            safe_alt_text = product.name.replace('"', '&quot;') if product.name else 'Produto'
-            image_html = f'<img src="{image_url}" alt="{safe_alt_text}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 8px;">'
-        elif product.image_url:
-            # Imagem via URL externa
-            safe_image_url = product.image_url.replace('"', '&quot;')
-            safe_alt_text = product.name.replace('"', '&quot;') if product.name else 'Produto'
-            image_html = f'<img src="{safe_image_url}" alt="{safe_alt_text}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 8px;" onerror="this.style.display=\'none\'; this.nextElementSibling.style.display=\'flex\';">'
-            image_html += '''<div class="bg-secondary text-white d-flex align-items-center justify-content-center" style="width: 50px; height: 50px; border-radius: 8px; display: none;">
-                                <i class="fas fa-image"></i>
-                            </div>'''
-        else:
-            image_html = '''<div class="bg-secondary text-white d-flex align-items-center justify-content-center" style="width: 50px; height: 50px; border-radius: 8px;">
-                                <i class="fas fa-image"></i>
-                            </div>'''
-        
-        # Status disponibilidade
-        status_html = '<span class="badge bg-success">Disponível</span>' if product.in_stock else '<span class="badge bg-danger">Indisponível</span>'
-        
-        products_rows += f'''
-        <tr>
-            <td>{image_html}</td>
-            <td><strong>{product.name}</strong></td>
-            <td><span class="badge bg-info">{product.category or 'Sem categoria'}</span></td>
-            <td><strong>R$ {product.price:.2f}</strong></td>
-            <td>
-                <span class="badge bg-{stock_badge_color}">
-                    {product.stock_quantity}
-                </span>
-            </td>
-            <td>{status_html}</td>
-            <td>
-                <div class="btn-group btn-group-sm">
-                    <a href="/admin/products/edit/{product.id}" class="btn btn-outline-primary">
-                        <i class="fas fa-edit"></i>
-                    </a>
-                    <a href="/admin/products/delete/{product.id}" class="btn btn-outline-danger"
-                       onclick="return confirm('Tem certeza que deseja excluir este produto?')">
-                        <i class="fas fa-trash"></i>
-                    </a>
-                </div>
-            </td>
-        </tr>
-        '''
+    # Paginação por cursor em (name, id): páginas profundas não pagam OFFSET
+    products = keyset_paginate(Product.query, (Product.name, Product.id),
+                               after=request.args.get('after'),
+                               before=request.args.get('before'),
+                               per_page=ADMIN_PAGE_SIZE)
     
-    html = f'''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Produtos - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link active" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-box"></i> Gerenciar Produtos ({products.total} produtos)</h1>
-                <a href="/admin/products/new" class="btn btn-primary">
-                    <i class="fas fa-plus"></i> Novo Produto
-                </a>
-            </div>
-            
-            <div class="table-responsive">
-                <table class="table table-striped">
-                    <thead class="table-dark">
-                        <tr>
-                            <th>Imagem</th>
-                            <th>Nome</th>
-                            <th>Categoria</th>
-                            <th>Preço</th>
-                            <th>Estoque</th>
-                            <th>Status</th>
-                            <th>Ações</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {products_rows}
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    return html
+    # Total aproximado vindo das estatísticas em cache (sem COUNT por página)
+    return render_template('admin_crud/products_list.html', products=products,
+                           total=get_dashboard_stats()['total_products'])
 
 @admin_bp.route('/products/new', methods=['GET', 'POST'])
 @login_required
@@ -333,9 +127,7 @@ def products_new():
             product.supplier = request.form.get('supplier')
             product.sku = request.form.get('sku') or ""
             product.image_url = image_url
-            product.image_data = image_data
-            product.image_filename = image_filename 
-            product.image_mimetype = image_mimetype
+            product.set_image(image_data, image_filename, image_mimetype)
             product.category = request.form.get('category')
             product.in_stock = request.form.get('in_stock') == 'on'
             
@@ -355,189 +147,30 @@ def products_new():
             import logging
             logging.error(f"[ADMIN] Erro ao criar produto: {str(e)}")
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Novo Produto - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link active" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-plus"></i> Novo Produto</h1>
-                <a href="/admin/products" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'error' else category }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <div class="row">
-                <div class="col-lg-8">
-                    <div class="card">
-                        <div class="card-body">
-                            <form method="POST" enctype="multipart/form-data">
-                                <div class="row">
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Nome do Produto *</label>
-                                            <input type="text" class="form-control" name="name" required>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Categoria</label>
-                                            <select class="form-control" name="category">
-                                                <option value="">Selecione uma categoria</option>
-                                                <option value="Pomadas">Pomadas</option>
-                                                <option value="Óleos">Óleos</option>
-                                                <option value="Shampoos">Shampoos</option>
-                                                <option value="Ceras">Ceras</option>
-                                                <option value="Pós-Barba">Pós-Barba</option>
-                                                <option value="Kits">Kits</option>
-                                                <option value="Outros">Outros</option>
-                                            </select>
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <label class="form-label">Descrição</label>
-                                    <textarea class="form-control" name="description" rows="3"></textarea>
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Preço de Venda (R$) *</label>
-                                            <input type="number" class="form-control" name="price" step="0.01" min="0" required>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Preço de Custo (R$)</label>
-                                            <input type="number" class="form-control" name="cost_price" step="0.01" min="0" value="0">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">SKU</label>
-                                            <input type="text" class="form-control" name="sku">
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Atual</label>
-                                            <input type="number" class="form-control" name="stock_quantity" min="0" value="0">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Mínimo</label>
-                                            <input type="number" class="form-control" name="min_stock_level" min="0" value="5">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Máximo</label>
-                                            <input type="number" class="form-control" name="max_stock_level" min="1" value="100">
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <label class="form-label">Fornecedor</label>
-                                    <input type="text" class="form-control" name="supplier">
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Imagem do Produto</label>
-                                            <input type="file" class="form-control" name="image_file" accept="image/*" onchange="previewImage(this)">
-                                            <small class="form-text text-muted">Selecione uma imagem (PNG, JPG, JPEG, GIF, WEBP)</small>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">OU URL da Imagem</label>
-                                            <input type="url" class="form-control" name="image_url" placeholder="https://exemplo.com/imagem.jpg">
-                                            <small class="form-text text-muted">Deixe em branco se usar upload</small>
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3" id="imagePreview" style="display: none;">
-                                    <label class="form-label">Preview da Imagem:</label>
-                                    <br>
-                                    <img id="preview" src="" alt="Preview" style="max-width: 200px; max-height: 200px; border-radius: 8px;">
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <div class="form-check">
-                                        <input class="form-check-input" type="checkbox" name="in_stock" id="in_stock" checked>
-                                        <label class="form-check-label" for="in_stock">
-                                            Produto disponível para venda
-                                        </label>
-                                    </div>
-                                </div>
-                                
-                                <div class="d-grid gap-2 d-md-flex justify-content-md-end">
-                                    <a href="/admin/products" class="btn btn-secondary me-md-2">Cancelar</a>
-                                    <button type="submit" class="btn btn-primary">
-                                        <i class="fas fa-save"></i> Salvar Produto
-                                    </button>
-                                </div>
-                            </form>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-        <script>
-            function previewImage(input) {
-                if (input.files && input.files[0]) {
-                    var reader = new FileReader();
-                    reader.onload = function(e) {
-                        document.getElementById('preview').src = e.target.result;
-                        document.getElementById('imagePreview').style.display = 'block';
-                    }
-                    reader.readAsDataURL(input.files[0]);
-                }
-            }
-        </script>
-    </body>
-    </html>
-    '''
-    return render_template_string(html)
+    return render_template('admin_crud/products_new.html')
+
+@admin_bp.route('/products/import', methods=['GET', 'POST'])
+@login_required
+def products_import():
+    """Importa uma planilha de produtos (CSV/XLSX), criando ou atualizando por SKU"""
+    result = None
+    if request.method == 'POST':
+        sheet = request.files.get('sheet')
+        images = request.files.get('images')
+        if not sheet or sheet.filename == '':
+            flash('Selecione uma planilha CSV ou XLSX', 'error')
+        else:
+            try:
+                result = import_products(sheet.filename, sheet.read(),
+                                         images.read() if images and images.filename else None)
+                flash(f"Importação concluída: {result['created']} criados, {result['updated']} atualizados, "
+                      f"{len(result['errors'])} erros", 'success' if not result['errors'] else 'warning')
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Erro ao ler a planilha: {str(e)}', 'error')
+    
+    return render_template('admin_crud/products_import.html', result=result,
+                           xlsx_available=is_xlsx_available())
 
 @admin_bp.route('/products/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -553,9 +186,7 @@ def products_edit(id):
                 file = request.files['image_file']
                 if file and file.filename != '' and allowed_file(file.filename):
                     # Salvar imagem no banco
-                    product.image_data = file.read()
-                    product.image_filename = secure_filename(file.filename)
-                    product.image_mimetype = file.mimetype
+                    product.set_image(file.read(), secure_filename(file.filename), file.mimetype)
                     # Limpar URL externa se houver upload
                     image_url = None
             
@@ -587,212 +218,7 @@ def products_edit(id):
             import logging
             logging.error(f"[ADMIN] Erro ao atualizar produto: {str(e)}")
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Editar Produto - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link active" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-edit"></i> Editar: {{ product.name }}</h1>
-                <a href="/admin/products" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'error' else category }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <div class="row">
-                <div class="col-lg-8">
-                    <div class="card">
-                        <div class="card-body">
-                            <form method="POST" enctype="multipart/form-data">
-                                <div class="row">
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Nome do Produto *</label>
-                                            <input type="text" class="form-control" name="name" value="{{ product.name }}" required>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Categoria</label>
-                                            <select class="form-control" name="category">
-                                                <option value="">Selecione uma categoria</option>
-                                                <option value="Pomadas" {{ 'selected' if product.category == 'Pomadas' }}>Pomadas</option>
-                                                <option value="Óleos" {{ 'selected' if product.category == 'Óleos' }}>Óleos</option>
-                                                <option value="Shampoos" {{ 'selected' if product.category == 'Shampoos' }}>Shampoos</option>
-                                                <option value="Ceras" {{ 'selected' if product.category == 'Ceras' }}>Ceras</option>
-                                                <option value="Pós-Barba" {{ 'selected' if product.category == 'Pós-Barba' }}>Pós-Barba</option>
-                                                <option value="Kits" {{ 'selected' if product.category == 'Kits' }}>Kits</option>
-                                                <option value="Outros" {{ 'selected' if product.category == 'Outros' }}>Outros</option>
-                                            </select>
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <label class="form-label">Descrição</label>
-                                    <textarea class="form-control" name="description" rows="3">{{ product.description or '' }}</textarea>
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Preço de Venda (R$) *</label>
-                                            <input type="number" class="form-control" name="price" step="0.01" min="0" value="{{ product.price }}" required>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Preço de Custo (R$)</label>
-                                            <input type="number" class="form-control" name="cost_price" step="0.01" min="0" value="{{ product.cost_price or 0 }}">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">SKU</label>
-                                            <input type="text" class="form-control" name="sku" value="{{ product.sku or '' }}">
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Atual</label>
-                                            <input type="number" class="form-control" name="stock_quantity" min="0" value="{{ product.stock_quantity }}">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Mínimo</label>
-                                            <input type="number" class="form-control" name="min_stock_level" min="0" value="{{ product.min_stock_level }}">
-                                        </div>
-                                    </div>
-                                    <div class="col-md-4">
-                                        <div class="mb-3">
-                                            <label class="form-label">Estoque Máximo</label>
-                                            <input type="number" class="form-control" name="max_stock_level" min="1" value="{{ product.max_stock_level }}">
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <label class="form-label">Fornecedor</label>
-                                    <input type="text" class="form-control" name="supplier" value="{{ product.supplier or '' }}">
-                                </div>
-                                
-                                <div class="row">
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">Nova Imagem</label>
-                                            <input type="file" class="form-control" name="image_file" accept="image/*" onchange="previewImage(this)">
-                                            <small class="form-text text-muted">Deixe em branco para manter imagem atual</small>
-                                        </div>
-                                    </div>
-                                    <div class="col-md-6">
-                                        <div class="mb-3">
-                                            <label class="form-label">OU URL da Imagem</label>
-                                            <input type="url" class="form-control" name="image_url" value="{{ product.image_url or '' }}">
-                                        </div>
-                                    </div>
-                                </div>
-                                
-                                <div class="mb-3" id="imagePreview" style="display: none;">
-                                    <label class="form-label">Preview da Nova Imagem:</label>
-                                    <br>
-                                    <img id="preview" src="" alt="Preview" style="max-width: 200px; max-height: 200px; border-radius: 8px;">
-                                </div>
-                                
-                                <div class="mb-3">
-                                    <div class="form-check">
-                                        <input class="form-check-input" type="checkbox" name="in_stock" id="in_stock" {{ 'checked' if product.in_stock }}>
-                                        <label class="form-check-label" for="in_stock">
-                                            Produto disponível para venda
-                                        </label>
-                                    </div>
-                                </div>
-                                
-                                <div class="d-grid gap-2 d-md-flex justify-content-md-end">
-                                    <a href="/admin/products" class="btn btn-secondary me-md-2">Cancelar</a>
-                                    <button type="submit" class="btn btn-primary">
-                                        <i class="fas fa-save"></i> Salvar Alterações
-                                    </button>
-                                </div>
-                            </form>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-lg-4">
-                    <div class="card">
-                        <div class="card-header">
-                            <h5>Preview da Imagem</h5>
-                        </div>
-                        <div class="card-body text-center">
-                            {% if product.image_url %}
-                                <img src="{{ product.image_url }}" alt="{{ product.name }}" 
-                                     class="img-fluid rounded" style="max-height: 200px;"
-                                     onerror="this.style.display='none'; this.nextElementSibling.style.display='flex';">
-                                <div class="bg-light d-flex align-items-center justify-content-center" 
-                                     style="height: 200px; border-radius: 8px; display: none;">
-                                    <i class="fas fa-image fa-3x text-muted"></i>
-                                </div>
-                            {% else %}
-                                <div class="bg-light d-flex align-items-center justify-content-center" 
-                                     style="height: 200px; border-radius: 8px;">
-                                    <i class="fas fa-image fa-3x text-muted"></i>
-                                </div>
-                                <p class="text-muted mt-2">Nenhuma imagem</p>
-                            {% endif %}
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-        <script>
-            function previewImage(input) {
-                if (input.files && input.files[0]) {
-                    var reader = new FileReader();
-                    reader.onload = function(e) {
-                        document.getElementById('preview').src = e.target.result;
-                        document.getElementById('imagePreview').style.display = 'block';
-                    }
-                    reader.readAsDataURL(input.files[0]);
-                }
-            }
-        </script>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, product=product)
+    return render_template('admin_crud/products_edit.html', product=product)
 
 @admin_bp.route('/products/delete/<int:id>')
 @login_required
@@ -820,93 +246,93 @@ def products_delete(id):
 @admin_bp.route('/orders')
 @login_required
 def orders_list():
-    page = request.args.get('page', 1, type=int)
-    per_page = 20
-    orders = Order.query.order_by(Order.created_at.desc()).paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False,
-        max_per_page=100
-    )
+    # Mais recentes primeiro, paginando por cursor em (created_at, id)
+    orders = keyset_paginate(Order.query, (Order.created_at, Order.id),
+                             after=request.args.get('after'),
+                             before=request.args.get('before'),
+                             per_page=ADMIN_PAGE_SIZE, descending=True)
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Pedidos - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link active" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <h1><i class="fas fa-shopping-cart"></i> Gerenciar Pedidos</h1>
-            
-            <div class="table-responsive mt-4">
-                <table class="table table-striped">
-                    <thead class="table-dark">
-                        <tr>
-                            <th>ID</th>
-                            <th>Cliente</th>
-                            <th>Telefone</th>
-                            <th>Total</th>
-                            <th>Status</th>
-                            <th>WhatsApp</th>
-                            <th>Data</th>
-                            <th>Ações</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for order in orders.items %}
-                        <tr>
-                            <td><strong>#{{ order.id }}</strong></td>
-                            <td>{{ order.customer_name }}</td>
-                            <td>{{ order.customer_phone or '-' }}</td>
-                            <td><strong>R$ {{ "%.2f"|format(order.total_amount) }}</strong></td>
-                            <td>
-                                <span class="badge bg-{% if order.status == 'completed' %}success{% elif order.status == 'pending' %}warning{% else %}danger{% endif %}">
-                                    {{ order.status.title() }}
-                                </span>
-                            </td>
-                            <td>
-                                {% if order.whatsapp_sent %}
-                                    <i class="fas fa-check-circle text-success"></i>
-                                {% else %}
-                                    <i class="fas fa-times-circle text-danger"></i>
-                                {% endif %}
-                            </td>
-                            <td>{{ order.created_at.strftime('%d/%m/%Y %H:%M') }}</td>
-                            <td>
-                                <div class="btn-group btn-group-sm">
-                                    <a href="/admin/orders/view/{{ order.id }}" class="btn btn-outline-info">
-                                        <i class="fas fa-eye"></i>
-                                    </a>
-                                    <a href="/admin/orders/edit/{{ order.id }}" class="btn btn-outline-primary">
-                                        <i class="fas fa-edit"></i>
-                                    </a>
-                                </div>
-                            </td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, orders=orders)
+    return render_template('admin_crud/orders_list.html', orders=orders,
+                           total=get_dashboard_stats()['total_orders'])
+
+@admin_bp.route('/movements')
+@login_required
+def movements_list():
+    """Histórico de movimentações de estoque, opcionalmente filtrado por produto"""
+    query = StockMovement.query.options(joinedload(StockMovement.product).load_only(Product.id, Product.name))
+    product_id = request.args.get('product_id', type=int)
+    if product_id:
+        query = query.filter(StockMovement.product_id == product_id)
+    
+    # O log só cresce: sem COUNT e sem OFFSET, cada página custa O(tamanho da página)
+    movements = keyset_paginate(query, (StockMovement.created_at, StockMovement.id),
+                                after=request.args.get('after'),
+                                before=request.args.get('before'),
+                                per_page=ADMIN_PAGE_SIZE, descending=True)
+    
+    return render_template('admin_crud/movements_list.html', movements=movements,
+                           product_id=product_id)
+
+@admin_bp.route('/stock/adjust', methods=['GET', 'POST'])
+@login_required
+def stock_adjust():
+    """Ajuste de estoque em lote (ex.: recebimento de uma remessa do fornecedor)"""
+    errors = []
+    text = request.form.get('lines', '')
+    if request.method == 'POST':
+        try:
+            lines = parse_adjustment_lines(text)
+            movements = apply_stock_adjustments(lines, default_reason=request.form.get('reason', '').strip() or 'Ajuste manual')
+            flash(f'{len(movements)} ajustes aplicados em {len({m["product_id"] for m in movements})} produtos', 'success')
+            text = ''
+        except StockAdjustmentError as e:
+            errors = e.errors
+            flash('Nenhum ajuste aplicado: corrija as linhas com erro', 'error')
+        except Exception as e:
+            import logging
+            logging.error(f"[ADMIN] Erro no ajuste de estoque em lote: {str(e)}")
+            flash('Erro ao aplicar os ajustes de estoque', 'error')
+    
+    return render_template('admin_crud/stock_adjust.html', lines=text, errors=errors)
+
+@admin_bp.route('/api/stock-adjustments', methods=['POST'])
+@login_required
+def stock_adjustments_api():
+    """
+    JSON: {"adjustments": [{"product_id" ou "sku", "delta", "reason"}, ...]}
+    Aplica tudo numa transação; 400 com os erros por item se algo for inválido.
+    """
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('adjustments')
+    if not isinstance(items, list) or not items:
+        return jsonify(errors=[{'line': 0, 'message': 'adjustments deve ser uma lista não vazia'}]), 400
+    
+    lines, errors = [], []
+    for line, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            item = {}
+        identifier = item.get('sku') or item.get('product_id')
+        delta = item.get('delta')
+        reason = item.get('reason')
+        if identifier is None or not isinstance(delta, int) or isinstance(delta, bool) or delta == 0:
+            errors.append((line, 'informe product_id ou sku e um delta inteiro diferente de zero'))
+            continue
+        if reason is not None and not isinstance(reason, str):
+            errors.append((line, 'reason deve ser um texto'))
+            continue
+        if reason and len(reason) > REASON_MAX_LENGTH:
+            errors.append((line, f'reason tem mais de {REASON_MAX_LENGTH} caracteres'))
+            continue
+        lines.append((line, str(identifier), delta, reason))
+    try:
+        if errors:
+            raise StockAdjustmentError(errors)
+        movements = apply_stock_adjustments(lines, created_by=str(payload.get('created_by') or 'API')[:100])
+    except StockAdjustmentError as e:
+        return jsonify(errors=[{'line': line, 'message': message} for line, message in e.errors]), 400
+    
+    return jsonify(applied=len(movements),
+                   movements=[{k: m[k] for k in ('product_id', 'old_quantity', 'new_quantity')} for m in movements])
 
 @admin_bp.route('/orders/view/<int:id>')
 @login_required
@@ -914,112 +340,7 @@ def orders_view(id):
     order = Order.query.get_or_404(id)
     order_items = OrderItem.query.filter_by(order_id=id).all()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Ver Pedido #{{ order.id }} - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link active" href="/admin/orders">Pedidos</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-eye"></i> Pedido #{{ order.id }}</h1>
-                <a href="/admin/orders" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            <div class="row">
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">
-                            <h5>Informações do Cliente</h5>
-                        </div>
-                        <div class="card-body">
-                            <p><strong>Nome:</strong> {{ order.customer_name }}</p>
-                            <p><strong>Telefone:</strong> {{ order.customer_phone or 'Não informado' }}</p>
-                            <p><strong>Email:</strong> {{ order.customer_email or 'Não informado' }}</p>
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">
-                            <h5>Informações do Pedido</h5>
-                        </div>
-                        <div class="card-body">
-                            <p><strong>Status:</strong> 
-                                <span class="badge bg-{% if order.status == 'completed' %}success{% elif order.status == 'pending' %}warning{% else %}danger{% endif %}">
-                                    {{ order.status.title() }}
-                                </span>
-                            </p>
-                            <p><strong>Total:</strong> R$ {{ "%.2f"|format(order.total_amount) }}</p>
-                            <p><strong>Data:</strong> {{ order.created_at.strftime('%d/%m/%Y %H:%M') }}</p>
-                            <p><strong>WhatsApp:</strong> 
-                                {% if order.whatsapp_sent %}
-                                    <i class="fas fa-check-circle text-success"></i> Enviado
-                                {% else %}
-                                    <i class="fas fa-times-circle text-danger"></i> Não enviado
-                                {% endif %}
-                            </p>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="card mt-4">
-                <div class="card-header">
-                    <h5>Itens do Pedido</h5>
-                </div>
-                <div class="card-body">
-                    <div class="table-responsive">
-                        <table class="table">
-                            <thead>
-                                <tr>
-                                    <th>Produto</th>
-                                    <th>Quantidade</th>
-                                    <th>Preço Unitário</th>
-                                    <th>Subtotal</th>
-                                </tr>
-                            </thead>
-                            <tbody>
-                                {% for item in order_items %}
-                                <tr>
-                                    <td>{{ item.product_name }}</td>
-                                    <td>{{ item.quantity }}</td>
-                                    <td>R$ {{ "%.2f"|format(item.unit_price) }}</td>
-                                    <td>R$ {{ "%.2f"|format(item.quantity * item.unit_price) }}</td>
-                                </tr>
-                                {% endfor %}
-                            </tbody>
-                            <tfoot>
-                                <tr class="table-dark">
-                                    <th colspan="3">Total:</th>
-                                    <th>R$ {{ "%.2f"|format(order.total_amount) }}</th>
-                                </tr>
-                            </tfoot>
-                        </table>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, order=order, order_items=order_items)
+    return render_template('admin_crud/orders_view.html', order=order, order_items=order_items)
 
 @admin_bp.route('/orders/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -1028,193 +349,93 @@ def orders_edit(id):
     
     if request.method == 'POST':
         try:
+            status_changed = order.status != request.form.get('status')
             order.status = request.form.get('status')
             order.customer_name = request.form.get('customer_name')
             order.customer_phone = request.form.get('customer_phone')
             order.customer_email = request.form.get('customer_email')
             
             db.session.commit()
+            if status_changed and order.created_at:
+                # Cancelar/reativar muda o faturamento do dia do pedido
+                refresh_sales_rollup(days=[order.created_at.date()])
             flash('Pedido atualizado com sucesso!', 'success')
             return redirect(url_for('admin_crud.orders_list'))
         except Exception as e:
             flash(f'Erro ao atualizar pedido: {str(e)}', 'error')
             db.session.rollback()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Editar Pedido #{{ order.id }} - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link active" href="/admin/orders">Pedidos</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-edit"></i> Editar Pedido #{{ order.id }}</h1>
-                <a href="/admin/orders" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'error' else category }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <div class="card">
-                <div class="card-body">
-                    <form method="POST">
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Nome do Cliente</label>
-                                    <input type="text" class="form-control" name="customer_name" value="{{ order.customer_name }}">
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Status do Pedido</label>
-                                    <select class="form-control" name="status">
-                                        <option value="pending" {{ 'selected' if order.status == 'pending' }}>Pendente</option>
-                                        <option value="processing" {{ 'selected' if order.status == 'processing' }}>Processando</option>
-                                        <option value="completed" {{ 'selected' if order.status == 'completed' }}>Concluído</option>
-                                        <option value="cancelled" {{ 'selected' if order.status == 'cancelled' }}>Cancelado</option>
-                                    </select>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Telefone</label>
-                                    <input type="text" class="form-control" name="customer_phone" value="{{ order.customer_phone or '' }}">
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Email</label>
-                                    <input type="email" class="form-control" name="customer_email" value="{{ order.customer_email or '' }}">
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="d-grid gap-2 d-md-flex justify-content-md-end">
-                            <a href="/admin/orders" class="btn btn-secondary me-md-2">Cancelar</a>
-                            <button type="submit" class="btn btn-primary">
-                                <i class="fas fa-save"></i> Salvar Alterações
-                            </button>
-                        </div>
-                    </form>
-                </div>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, order=order)
+    return render_template('admin_crud/orders_edit.html', order=order)
+
+@admin_bp.route('/reports')
+@login_required
+def reports():
+    """Relatório de vendas e valor de estoque lido das tabelas de resumo diário"""
+    today = datetime.utcnow().date()
+    try:
+        end = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        end = today
+    try:
+        start = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+    except ValueError:
+        start = end - timedelta(days=89)
+    if start > end:
+        start, end = end, start
+    
+    refresh_rollups()
+    report = get_sales_report(start, end)
+    return render_template('admin_crud/reports.html', start=start, end=end, **report)
+
+@admin_bp.route('/profiler')
+@login_required
+def profiler():
+    """Consultas SQL por rota (QUERY_PROFILER=1), só deste processo"""
+    from profiler import is_profiler_enabled, get_profiles, summarize_profiles
+    profiles = get_profiles()
+    route = request.args.get('route')
+    recent = [p for p in profiles if not route or p['endpoint'] == route]
+    return render_template('admin_crud/profiler.html', enabled=is_profiler_enabled(),
+                           summary=summarize_profiles(profiles), recent=recent[:ADMIN_PAGE_SIZE * 5],
+                           route=route,
+                           slow_ms=app.config['QUERY_PROFILER_SLOW_MS'],
+                           n_plus_one=app.config['QUERY_PROFILER_N_PLUS_ONE'])
+
+@admin_bp.route('/exports')
+@login_required
+def exports():
+    return render_template('admin_crud/exports.html')
+
+@admin_bp.route('/exports/<kind>')
+@login_required
+def exports_download(kind):
+    """Exporta pedidos, movimentações ou inventário em CSV/XLSX, linha a linha"""
+    fmt = request.args.get('format', 'csv')
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        flash('Exportação inválida', 'error')
+        return redirect(url_for('admin_crud.exports'))
+    
+    dates = {}
+    for name in ('start', 'end'):
+        try:
+            dates[name] = datetime.strptime(request.args.get(name, ''), '%Y-%m-%d').date()
+        except ValueError:
+            dates[name] = None
+    
+    header, rows = export_rows(kind, status=request.args.get('status'), **dates)
+    stream = stream_csv if fmt == 'csv' else stream_xlsx
+    filename = f"{kind}-{datetime.utcnow().strftime('%Y%m%d-%H%M')}.{fmt}"
+    # stream_with_context mantém a sessão (e o cursor do servidor) aberta até a última linha
+    return Response(stream_with_context(stream(header, rows)),
+                    mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 @admin_bp.route('/suppliers')
 @login_required
 def suppliers_list():
     suppliers = Supplier.query.all()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Fornecedores - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link active" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-truck"></i> Gerenciar Fornecedores</h1>
-                <a href="/admin/suppliers/new" class="btn btn-primary">
-                    <i class="fas fa-plus"></i> Novo Fornecedor
-                </a>
-            </div>
-            
-            <div class="table-responsive">
-                <table class="table table-striped">
-                    <thead class="table-dark">
-                        <tr>
-                            <th>Nome</th>
-                            <th>Contato</th>
-                            <th>Email</th>
-                            <th>Telefone</th>
-                            <th>Status</th>
-                            <th>Ações</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for supplier in suppliers %}
-                        <tr>
-                            <td><strong>{{ supplier.name }}</strong></td>
-                            <td>{{ supplier.contact_person or '-' }}</td>
-                            <td>{{ supplier.email or '-' }}</td>
-                            <td>{{ supplier.phone or '-' }}</td>
-                            <td>
-                                {% if supplier.is_active %}
-                                    <span class="badge bg-success">Ativo</span>
-                                {% else %}
-                                    <span class="badge bg-danger">Inativo</span>
-                                {% endif %}
-                            </td>
-                            <td>
-                                <div class="btn-group btn-group-sm">
-                                    <a href="/admin/suppliers/edit/{{ supplier.id }}" class="btn btn-outline-primary">
-                                        <i class="fas fa-edit"></i>
-                                    </a>
-                                    <a href="/admin/suppliers/delete/{{ supplier.id }}" class="btn btn-outline-danger"
-                                       onclick="return confirm('Tem certeza que deseja excluir este fornecedor?')">
-                                        <i class="fas fa-trash"></i>
-                                    </a>
-                                </div>
-                            </td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, suppliers=suppliers)
+    return render_template('admin_crud/suppliers_list.html', suppliers=suppliers)
 
 @admin_bp.route('/suppliers/new', methods=['GET', 'POST'])
 def suppliers_new():
@@ -1238,109 +459,7 @@ def suppliers_new():
             flash(f'Erro ao criar fornecedor: {str(e)}', 'error')
             db.session.rollback()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Novo Fornecedor - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link active" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-plus"></i> Novo Fornecedor</h1>
-                <a href="/admin/suppliers" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'error' else category }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <div class="card">
-                <div class="card-body">
-                    <form method="POST">
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Nome do Fornecedor *</label>
-                                    <input type="text" class="form-control" name="name" required>
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Pessoa de Contato</label>
-                                    <input type="text" class="form-control" name="contact_person">
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Email</label>
-                                    <input type="email" class="form-control" name="email">
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Telefone</label>
-                                    <input type="text" class="form-control" name="phone">
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="mb-3">
-                            <label class="form-label">Endereço</label>
-                            <textarea class="form-control" name="address" rows="3"></textarea>
-                        </div>
-                        
-                        <div class="mb-3">
-                            <div class="form-check">
-                                <input class="form-check-input" type="checkbox" name="is_active" id="is_active" checked>
-                                <label class="form-check-label" for="is_active">
-                                    Fornecedor ativo
-                                </label>
-                            </div>
-                        </div>
-                        
-                        <div class="d-grid gap-2 d-md-flex justify-content-md-end">
-                            <a href="/admin/suppliers" class="btn btn-secondary me-md-2">Cancelar</a>
-                            <button type="submit" class="btn btn-primary">
-                                <i class="fas fa-save"></i> Salvar Fornecedor
-                            </button>
-                        </div>
-                    </form>
-                </div>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    </body>
-    </html>
-    '''
-    return render_template_string(html)
+    return render_template('admin_crud/suppliers_new.html')
 
 @admin_bp.route('/suppliers/edit/<int:id>', methods=['GET', 'POST'])
 def suppliers_edit(id):
@@ -1362,109 +481,7 @@ def suppliers_edit(id):
             flash(f'Erro ao atualizar fornecedor: {str(e)}', 'error')
             db.session.rollback()
     
-    html = '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Editar Fornecedor - Admin Visage</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-    </head>
-    <body>
-        <nav class="navbar navbar-expand-lg navbar-dark bg-dark">
-            <div class="container">
-                <a class="navbar-brand" href="/admin/">🏪 Visage Admin</a>
-                <div class="navbar-nav">
-                    <a class="nav-link" href="/admin/">Dashboard</a>
-                    <a class="nav-link" href="/admin/products">Produtos</a>
-                    <a class="nav-link" href="/admin/orders">Pedidos</a>
-                    <a class="nav-link active" href="/admin/suppliers">Fornecedores</a>
-                </div>
-            </div>
-        </nav>
-        
-        <div class="container mt-4">
-            <div class="d-flex justify-content-between align-items-center mb-4">
-                <h1><i class="fas fa-edit"></i> Editar: {{ supplier.name }}</h1>
-                <a href="/admin/suppliers" class="btn btn-secondary">
-                    <i class="fas fa-arrow-left"></i> Voltar
-                </a>
-            </div>
-            
-            {% with messages = get_flashed_messages(with_categories=true) %}
-                {% if messages %}
-                    {% for category, message in messages %}
-                        <div class="alert alert-{{ 'danger' if category == 'error' else category }} alert-dismissible fade show">
-                            {{ message }}
-                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                        </div>
-                    {% endfor %}
-                {% endif %}
-            {% endwith %}
-            
-            <div class="card">
-                <div class="card-body">
-                    <form method="POST">
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Nome do Fornecedor *</label>
-                                    <input type="text" class="form-control" name="name" value="{{ supplier.name }}" required>
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Pessoa de Contato</label>
-                                    <input type="text" class="form-control" name="contact_person" value="{{ supplier.contact_person or '' }}">
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="row">
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Email</label>
-                                    <input type="email" class="form-control" name="email" value="{{ supplier.email or '' }}">
-                                </div>
-                            </div>
-                            <div class="col-md-6">
-                                <div class="mb-3">
-                                    <label class="form-label">Telefone</label>
-                                    <input type="text" class="form-control" name="phone" value="{{ supplier.phone or '' }}">
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="mb-3">
-                            <label class="form-label">Endereço</label>
-                            <textarea class="form-control" name="address" rows="3">{{ supplier.address or '' }}</textarea>
-                        </div>
-                        
-                        <div class="mb-3">
-                            <div class="form-check">
-                                <input class="form-check-input" type="checkbox" name="is_active" id="is_active" {{ 'checked' if supplier.is_active }}>
-                                <label class="form-check-label" for="is_active">
-                                    Fornecedor ativo
-                                </label>
-                            </div>
-                        </div>
-                        
-                        <div class="d-grid gap-2 d-md-flex justify-content-md-end">
-                            <a href="/admin/suppliers" class="btn btn-secondary me-md-2">Cancelar</a>
-                            <button type="submit" class="btn btn-primary">
-                                <i class="fas fa-save"></i> Salvar Alterações
-                            </button>
-                        </div>
-                    </form>
-                </div>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    </body>
-    </html>
-    '''
-    return render_template_string(html, supplier=supplier)
+    return render_template('admin_crud/suppliers_edit.html', supplier=supplier)
 
 @admin_bp.route('/suppliers/delete/<int:id>')
 def suppliers_delete(id):
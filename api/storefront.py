@@ -0,0 +1,11 @@
+# Vercel serverless function for the storefront (everything outside /admin)
+import sys
+import os
+
+# Add the parent directory to the Python path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storefront import app
+
+# Export the Flask app for Vercel
+application = app
@@ -1,5 +1,6 @@
 import os
 import logging
+import importlib
 
 # Load environment variables from .env file first
 try:
@@ -84,95 +85,143 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 }
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Image store backend: 'database' (tabela product_images) or 'filesystem'
+app.config["IMAGE_STORE_BACKEND"] = os.environ.get("IMAGE_STORE_BACKEND", "database")
+app.config["IMAGE_STORE_PATH"] = os.environ.get("IMAGE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_store"))
+
+# Cart backend: 'database' (tabela cart_items, sobrevive entre dispositivos) or 'session' (cookie assinado, sem escrita no banco)
+app.config["CART_BACKEND"] = os.environ.get("CART_BACKEND", "database")
+
+# Cache backend: 'lru' (memória do processo), 'redis' (qualquer servidor compatível com Redis) or 'none'
+app.config["CACHE_BACKEND"] = os.environ.get("CACHE_BACKEND", "lru")
+app.config["CACHE_REDIS_URL"] = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+app.config["CACHE_MAX_ENTRIES"] = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+# With the in-process LRU each worker invalidates only its own copy, so the TTL bounds staleness across workers
+app.config["CATALOG_CACHE_TTL"] = int(os.environ.get("CATALOG_CACHE_TTL", "300"))
+# Browsers/CDNs may reuse /api/products pages for this long (stock shown may lag; the cart re-checks it)
+app.config["CATALOG_API_MAX_AGE"] = int(os.environ.get("CATALOG_API_MAX_AGE", "60"))
+# Rendered product cards are kept in each worker up to this many bytes (0 disables fragment caching)
+app.config["FRAGMENT_CACHE_MAX_BYTES"] = int(os.environ.get("FRAGMENT_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+# Admin dashboard totals are cached briefly; they may lag the database by this many seconds
+app.config["DASHBOARD_CACHE_TTL"] = int(os.environ.get("DASHBOARD_CACHE_TTL", "30"))
+# The in-memory search index is rebuilt at least this often, so changes made by other workers show up
+app.config["SEARCH_INDEX_TTL"] = int(os.environ.get("SEARCH_INDEX_TTL", "60"))
+
+# Opt-in SQL profiling per request: Server-Timing header, one JSON log line per request and /admin/profiler
+app.config["QUERY_PROFILER"] = os.environ.get("QUERY_PROFILER", "0").lower() in ("1", "true")
+app.config["QUERY_PROFILER_SLOW_MS"] = float(os.environ.get("QUERY_PROFILER_SLOW_MS", "100"))
+# Same statement this many times in one request with different parameters is reported as N+1
+app.config["QUERY_PROFILER_N_PLUS_ONE"] = int(os.environ.get("QUERY_PROFILER_N_PLUS_ONE", "5"))
+app.config["QUERY_PROFILER_HISTORY"] = int(os.environ.get("QUERY_PROFILER_HISTORY", "500"))
+
+# Serverless mode skips all schema/seed work at import (Vercel sets VERCEL=1)
+app.config["SERVERLESS_MODE"] = os.environ.get("SERVERLESS_MODE", "1" if os.environ.get("VERCEL") else "0").lower() in ("1", "true")
+
 # Initialize database extension
 db.init_app(app)
 
+# {% cache %} tag for per-fragment caching in templates
+app.jinja_env.add_extension('fragment_cache.FragmentCacheExtension')
+
+if app.config["QUERY_PROFILER"]:
+    from profiler import init_profiler
+    init_profiler(app)
+
 def init_database():
-    """Initialize database tables and default data"""
+    """
+    Make sure the database schema is ready before serving requests.
+
+    When the schema_version sentinel already matches, this costs a single
+    query. In serverless mode (SERVERLESS_MODE or Vercel) nothing runs at
+    import time: schema and seed data are applied by ``flask bootstrap-db``
+    during deploy.
+    """
+    if app.config.get("SERVERLESS_MODE"):
+        return
     try:
         with app.app_context():
-            import models  # Import models
-
-            # Test connection
-            from sqlalchemy import text
-            db.session.execute(text("SELECT 1"))
-            print("✅ Conexão com Supabase estabelecida com sucesso!")
-
-            # Create tables (only if they don't exist in Supabase)
-            db.create_all()
-            
-            # Add new image columns to existing products table if they don't exist
-            try:
-                from sqlalchemy import text
-                # Check if image_data column exists
-                result = db.session.execute(text("""
-                    SELECT column_name FROM information_schema.columns 
-                    WHERE table_name = 'products' AND column_name = 'image_data'
-                """)).fetchone()
-                
-                if not result:
-                    # Add new columns for image storage
-                    db.session.execute(text("ALTER TABLE products ADD COLUMN image_data BYTEA"))
-                    db.session.execute(text("ALTER TABLE products ADD COLUMN image_filename VARCHAR(255)"))
-                    db.session.execute(text("ALTER TABLE products ADD COLUMN image_mimetype VARCHAR(100)"))
-                    db.session.commit()
-                    print("✅ Colunas de imagem adicionadas à tabela products")
-            except Exception as e:
-                print(f"Info: Colunas de imagem já existem ou erro: {e}")
-                db.session.rollback()
-
-            # Create initial admin user from environment variables
-            from models import AdminUser
-            if AdminUser.query.count() == 0:
-                admin_username = os.environ.get("ADMIN_USERNAME")
-                admin_password = os.environ.get("ADMIN_PASSWORD")
-                if admin_username and admin_password:
-                    admin = AdminUser(username=admin_username)
-                    admin.set_password(admin_password)
-                    db.session.add(admin)
-                    db.session.commit()
-                    print("✅ Usuário administrador criado")
-                else:
-                    print("⚠️ ADMIN_USERNAME e ADMIN_PASSWORD não configurados")
-
-            # Create initial product
-            from models import Product
-            if Product.query.count() == 0:
-                p1 = Product(
-                    name="Suavecito Pomade Original",
-                    description="Pomada à base d'água com fixação forte e brilho médio.",
-                    price=45.90,
-                    cost_price=25.00,
-                    stock_quantity=50,
-                    min_stock_level=10,
-                    max_stock_level=100,
-                    supplier="Suavecito",
-                    sku="SUV-POM-001",
-                    image_url="https://images.unsplash.com/photo-1585747860715-2ba37e788b70?w=300&h=300&fit=crop&auto=format",
-                    category="Pomadas",
-                    in_stock=True
-                )
-                db.session.add(p1)
-                db.session.commit()
-                logging.info("Produto inicial criado com sucesso!")
-
+            from bootstrap import schema_is_current, bootstrap_database
+            if not schema_is_current():
+                bootstrap_database()
     except Exception as e:
         print(f"❌ ERRO na conexão com Supabase: {str(e)}")
 
-# Initialize database only if running directly (not during import)
-if __name__ != '__main__':
-    try:
-        # Load admin CRUD module
-        import admin_crud
-        print("Admin CRUD customizado carregado com sucesso!")
-    except Exception as e:
-        print(f"Erro ao carregar admin customizado: {e}")
-    
-    # Load routes
-    try:
-        from routes import *
-    except Exception as e:
-        print(f"Erro ao carregar rotas: {e}")
+
+@app.cli.command("bootstrap-db")
+def bootstrap_db_command():
+    """Create/migrate the schema and seed default data (run on deploy)"""
+    from bootstrap import bootstrap_database
+    bootstrap_database()
+
+
+@app.cli.command("explain-indexes")
+def explain_indexes_command():
+    """EXPLAIN the hot queries and check that each one uses its index"""
+    from migrations import explain_hot_queries
+    failed = 0
+    for name, index, used, plan in explain_hot_queries():
+        print(f"{'✅' if used else '❌'} {name}: {index}")
+        if not used:
+            failed += 1
+            print(f"    {plan}")
+    if failed:
+        raise SystemExit(1)
+
+
+@app.cli.command("refresh-reports")
+def refresh_reports_command():
+    """Fold new orders and stock changes into the daily rollup tables (cron)"""
+    from reports import refresh_sales_rollup, refresh_stock_snapshot
+    days = refresh_sales_rollup()
+    refresh_stock_snapshot()
+    print(f"✅ Relatórios atualizados ({days} dias recalculados)")
+
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Fingerprint and precompress static/css and static/js into static/dist"""
+    from assets import build_assets, brotli
+    manifest = build_assets()
+    for name, hashed in sorted(manifest.items()):
+        print(f"✅ {name} -> dist/{hashed}")
+    if brotli is None:
+        print("⚠️  brotli não instalado: apenas cópias .gz foram geradas")
+
+
+# Optional parts of the app, loaded on demand by create_app(). Each module
+# registers its views on ``app`` when imported, so nothing here is imported
+# until an entry point asks for it.
+APP_COMPONENTS = {
+    'storefront': 'routes',        # catálogo, carrinho, checkout e imagens
+    'admin_crud': 'admin_crud',    # painel /admin customizado
+    'flask_admin': 'admin',        # painel Flask-Admin em /admin/painel
+}
+
+# Components served by the default entry point (main.py)
+app.config["APP_COMPONENTS"] = [c.strip() for c in os.environ.get("APP_COMPONENTS", "storefront,admin_crud").split(",") if c.strip()]
+
+
+def create_app(components=None):
+    """
+    Load the requested components (default: APP_COMPONENTS) and return the app.
+
+    The storefront is always loaded because the shared templates and error
+    pages link to it. Entry points only pay the import cost of what they
+    serve: the storefront-only entry (storefront.py) never imports the admin
+    CRUD or Flask-Admin. Components must be loaded before the first request.
+    """
+    if components is None:
+        components = app.config["APP_COMPONENTS"]
+    for name in ['storefront'] + [c for c in components if c != 'storefront']:
+        if name not in APP_COMPONENTS:
+            logging.warning(f"Componente desconhecido ignorado: {name}")
+            continue
+        try:
+            importlib.import_module(APP_COMPONENTS[name])
+        except Exception as e:
+            print(f"Erro ao carregar componente {name}: {e}")
+    return app
+
 
 # Handlers de erro
 @app.errorhandler(404)
@@ -188,12 +237,9 @@ def handle_exception(e):
     logging.error(f'Erro interno: {str(e)}')
     return render_template('error.html'), getattr(e, 'code', 500)
 
-# Importa rotas apenas se não foi importado antes
-if 'routes' not in locals():
-    from routes import *
-
 # Template helper functions
 @app.context_processor
 def inject_helpers():
     from helpers import get_image_url
-    return dict(get_image_url=get_image_url)
+    from assets import static_url
+    return dict(get_image_url=get_image_url, static_url=static_url)
@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+from flask import request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só as cópias .gz são geradas
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Fingerprinted copies live under static/dist so any server (or the CDN) can serve them as files
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Folders of static/ that are built; uploads are user content and stay as they are
+ASSET_FOLDERS = ('css', 'js', 'img', 'fonts')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+# Smaller files gain nothing from compression
+MIN_COMPRESS_SIZE = 1024
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+_manifest = None
+
+
+def build_assets(source=STATIC_DIR, dest=DIST_DIR):
+    """
+    Fingerprint the static assets and precompress them.
+
+    Each file under ASSET_FOLDERS is copied to ``dest`` as
+    ``name.<hash>.ext`` (first 10 hex chars of its sha256), with ``.gz`` and
+    ``.br`` siblings for text files. The previous build is removed. Returns
+    the manifest {original path: fingerprinted path} also written to
+    ``dest/manifest.json``.
+    """
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    manifest = {}
+    for folder in ASSET_FOLDERS:
+        for root, _, files in os.walk(os.path.join(source, folder)):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, source).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+
+                stem, ext = os.path.splitext(name)
+                hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+                target = os.path.join(dest, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+
+                if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+                    with open(target + '.gz', 'wb') as f:
+                        # mtime=0 keeps the output identical between builds
+                        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        with open(target + '.br', 'wb') as f:
+                            f.write(brotli.compress(data, quality=11))
+                manifest[name] = hashed
+
+    os.makedirs(dest, exist_ok=True)
+    with open(os.path.join(dest, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def get_manifest():
+    """Manifest of the last build, read once per process ({} if never built)"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            _manifest = {}
+        except Exception as e:
+            logging.error(f"Erro ao ler manifest de assets: {e}")
+            _manifest = {}
+    return _manifest
+
+
+def static_url(filename):
+    """URL of the fingerprinted copy of a static file, or of the file itself if it was not built"""
+    hashed = get_manifest().get(filename)
+    if hashed:
+        return url_for('static_asset', filename=hashed)
+    return url_for('static', filename=filename)
+
+
+def send_asset(filename):
+    """
+    Serve a fingerprinted asset, preferring its brotli or gzip copy.
+
+    The name changes whenever the content does, so responses are cacheable
+    for a year and marked immutable.
+    """
+    path = os.path.join(DIST_DIR, filename)
+    if filename.endswith(('.gz', '.br')) or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = request.headers.get('Accept-Encoding', '')
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in accepted and os.path.isfile(path + suffix):
+            response = send_from_directory(DIST_DIR, filename + suffix, mimetype=mimetype,
+                                           max_age=31536000)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=31536000)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
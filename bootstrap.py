@@ -0,0 +1,74 @@
+import os
+import logging
+from sqlalchemy import text
+from app import app, db
+import models  # Import models so create_all sees every table
+from migrations import apply_migrations, current_version, latest_version
+
+# Latest migration in migrations.py; add a migration to change the schema
+SCHEMA_VERSION = latest_version()
+
+
+def schema_is_current():
+    """
+    Check the schema_version sentinel with a single cheap query.
+
+    Returns False when the table is missing or holds an older version, so
+    the caller knows bootstrap_database has to run.
+    """
+    return current_version() >= SCHEMA_VERSION
+
+
+def bootstrap_database():
+    """Create tables, apply pending migrations and create default data"""
+    with app.app_context():
+        # Test connection
+        db.session.execute(text("SELECT 1"))
+        print("✅ Conexão com Supabase estabelecida com sucesso!")
+
+        # Create tables (only if they don't exist in Supabase)
+        db.create_all()
+
+        # Apply pending schema migrations (see migrations.py)
+        apply_migrations()
+
+        # Create initial admin user from environment variables
+        from models import AdminUser
+        if AdminUser.query.count() == 0:
+            admin_username = os.environ.get("ADMIN_USERNAME")
+            admin_password = os.environ.get("ADMIN_PASSWORD")
+            if admin_username and admin_password:
+                admin = AdminUser(username=admin_username)
+                admin.set_password(admin_password)
+                db.session.add(admin)
+                db.session.commit()
+                print("✅ Usuário administrador criado")
+            else:
+                print("⚠️ ADMIN_USERNAME e ADMIN_PASSWORD não configurados")
+
+        # Create initial product
+        from models import Product
+        if Product.query.count() == 0:
+            p1 = Product(
+                name="Suavecito Pomade Original",
+                description="Pomada à base d'água com fixação forte e brilho médio.",
+                price=45.90,
+                cost_price=25.00,
+                stock_quantity=50,
+                min_stock_level=10,
+                max_stock_level=100,
+                supplier="Suavecito",
+                sku="SUV-POM-001",
+                image_url="https://images.unsplash.com/photo-1585747860715-2ba37e788b70?w=300&h=300&fit=crop&auto=format",
+                category="Pomadas",
+                in_stock=True
+            )
+            db.session.add(p1)
+            db.session.commit()
+            logging.info("Produto inicial criado com sucesso!")
+
+        print(f"✅ Schema na versão {SCHEMA_VERSION}")
+
+
+if __name__ == '__main__':
+    bootstrap_database()
@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from app import app
+
+
+class CacheBackend:
+    """
+    Minimal key/value cache interface shared by the cache layers.
+
+    Values must be JSON-serializable so every backend can store them.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def incr(self, key):
+        """Atomically increment an integer counter and return the new value"""
+        raise NotImplementedError
+
+
+class NullCache(CacheBackend):
+    """Cache that never stores anything (CACHE_BACKEND=none)"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process LRU cache with optional per-entry TTL.
+
+    Each worker process has its own copy, so entries written by another
+    process are only seen after their TTL expires. Counters (incr) are kept
+    outside the LRU and are never evicted: a version counter that restarted
+    would make entries cached under an older version current again.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._counters:
+                return self._counters[key]
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._counters.pop(key, None)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._counters.pop(key, None)
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            if key not in self._counters:
+                entry = self._data.pop(key, None)
+                self._counters[key] = entry[0] if entry else 0
+            self._counters[key] += 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisCache(CacheBackend):
+    """Cache stored in Redis or any Redis-compatible server (Valkey, KeyDB...)"""
+
+    def __init__(self, url, prefix='visage:'):
+        import redis  # Dependência opcional, só necessária com CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+_cache = None
+
+
+def get_cache():
+    """Return the configured cache backend (CACHE_BACKEND: lru, redis or none)"""
+    global _cache
+    if _cache is None:
+        backend = app.config.get('CACHE_BACKEND', 'lru')
+        if backend == 'redis':
+            try:
+                _cache = RedisCache(app.config['CACHE_REDIS_URL'])
+            except Exception as e:
+                logging.error(f"Redis indisponível, usando cache em memória: {e}")
+                _cache = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        elif backend == 'none':
+            _cache = NullCache()
+        else:
+            _cache = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 1024))
+    return _cache
@@ -0,0 +1,201 @@
+import uuid
+from flask import session
+from sqlalchemy.orm import joinedload, load_only
+from app import app, db
+from models import Product, CartItem
+
+# Product columns needed to render the cart and run checkout stock checks
+CART_PRODUCT_COLUMNS = (
+    Product.id, Product.name, Product.price, Product.category, Product.image_url,
+    Product.image_hash, Product.image_size, Product.stock_quantity, Product.in_stock,
+)
+
+
+def get_session_id():
+    """Get or create a session ID for the current user"""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+
+class CartStore:
+    """
+    Storage for the current visitor's cart.
+
+    Lines returned by ``items()`` expose ``id``, ``product_id``, ``product``,
+    ``quantity`` and ``total_price`` regardless of the backend, so routes and
+    templates do not care where the cart lives. Write methods do not commit;
+    the caller owns the transaction.
+    """
+
+    def items(self):
+        raise NotImplementedError
+
+    def get_quantity(self, product_id):
+        raise NotImplementedError
+
+    def add(self, product_id, quantity):
+        """Set the quantity of a product already in the cart or add a new line"""
+        raise NotImplementedError
+
+    def get_line(self, item_id):
+        raise NotImplementedError
+
+    def set_quantity(self, item_id, quantity):
+        raise NotImplementedError
+
+    def remove(self, item_id):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def count(self):
+        """Number of distinct products in the cart"""
+        raise NotImplementedError
+
+
+class DatabaseCartStore(CartStore):
+    """Cart kept in the cart_items table, keyed by the session UUID"""
+
+    def items(self):
+        # Products are joined in the same query (no per-line lazy SELECT)
+        items = CartItem.query.options(
+            joinedload(CartItem.product).load_only(*CART_PRODUCT_COLUMNS)
+        ).filter_by(session_id=get_session_id()).order_by(CartItem.id).all()
+        session['cart_count'] = len(items)
+        return items
+
+    def get_quantity(self, product_id):
+        item = CartItem.query.filter_by(session_id=get_session_id(), product_id=product_id).first()
+        return item.quantity if item else 0
+
+    def add(self, product_id, quantity):
+        session_id = get_session_id()
+        item = CartItem.query.filter_by(session_id=session_id, product_id=product_id).first()
+        if item:
+            item.quantity = quantity
+        else:
+            # Counted before the add: the COUNT would autoflush the new line and include it
+            count = self.count()
+            db.session.add(CartItem(session_id=session_id, product_id=product_id, quantity=quantity))
+            session['cart_count'] = count + 1
+
+    def get_line(self, item_id):
+        return CartItem.query.options(
+            joinedload(CartItem.product).load_only(*CART_PRODUCT_COLUMNS)
+        ).filter_by(id=item_id, session_id=get_session_id()).first()
+
+    def set_quantity(self, item_id, quantity):
+        item = self.get_line(item_id)
+        if item:
+            item.quantity = quantity
+        return item
+
+    def remove(self, item_id):
+        item = self.get_line(item_id)
+        if item:
+            count = self.count()
+            db.session.delete(item)
+            session['cart_count'] = max(0, count - 1)
+        return item
+
+    def clear(self):
+        if 'session_id' in session:
+            CartItem.query.filter_by(session_id=session['session_id']).delete()
+        session['cart_count'] = 0
+
+    def count(self):
+        # Count is cached in the signed session so the navbar badge costs no query;
+        # the database is only consulted once for sessions that predate the cache.
+        if 'cart_count' not in session:
+            if 'session_id' not in session:
+                return 0
+            session['cart_count'] = CartItem.query.filter_by(
+                session_id=session['session_id']).count()
+        return session['cart_count']
+
+
+class SessionCartLine:
+    """Cart line backed by the session; its id is the product id"""
+
+    def __init__(self, product, quantity):
+        self.id = product.id
+        self.product_id = product.id
+        self.product = product
+        self.quantity = quantity
+
+    @property
+    def total_price(self):
+        return self.product.price * self.quantity
+
+
+class SessionCartStore(CartStore):
+    """
+    Cart kept entirely in the signed session cookie as {product_id: quantity}.
+
+    Browsing and carting cause no writes to the database; products are only
+    read to render the cart. Carts do not follow the customer across devices.
+    """
+
+    def _cart(self):
+        return session.get('cart', {})
+
+    def _save(self, cart):
+        session['cart'] = cart
+
+    def items(self):
+        cart = self._cart()
+        if not cart:
+            return []
+        products = Product.query.options(load_only(*CART_PRODUCT_COLUMNS)).filter(
+            Product.id.in_([int(pid) for pid in cart])).all()
+        products_by_id = {product.id: product for product in products}
+        lines = [SessionCartLine(products_by_id[int(pid)], quantity)
+                 for pid, quantity in cart.items() if int(pid) in products_by_id]
+        if len(lines) != len(cart):
+            # Drop lines whose product no longer exists
+            self._save({str(line.product_id): line.quantity for line in lines})
+        return lines
+
+    def get_quantity(self, product_id):
+        return self._cart().get(str(product_id), 0)
+
+    def add(self, product_id, quantity):
+        cart = dict(self._cart())
+        cart[str(product_id)] = quantity
+        self._save(cart)
+
+    def get_line(self, item_id):
+        quantity = self.get_quantity(item_id)
+        if not quantity:
+            return None
+        product = db.session.get(Product, item_id, options=[load_only(*CART_PRODUCT_COLUMNS)])
+        return SessionCartLine(product, quantity) if product else None
+
+    def set_quantity(self, item_id, quantity):
+        line = self.get_line(item_id)
+        if line:
+            self.add(item_id, quantity)
+            line.quantity = quantity
+        return line
+
+    def remove(self, item_id):
+        line = self.get_line(item_id)
+        cart = dict(self._cart())
+        if cart.pop(str(item_id), None) is not None:
+            self._save(cart)
+        return line
+
+    def clear(self):
+        session.pop('cart', None)
+
+    def count(self):
+        return len(self._cart())
+
+
+def get_cart_store():
+    """Return the cart backend selected by CART_BACKEND ('database' or 'session')"""
+    if app.config.get('CART_BACKEND') == 'session':
+        return SessionCartStore()
+    return DatabaseCartStore()
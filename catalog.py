@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+from itertools import chain
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session, load_only
+from app import app
+from cache import get_cache
+from models import Product
+from pagination import encode_cursor, keyset_paginate
+
+# Every cache key embeds the current catalog version, so bumping the
+# version invalidates all cached catalog data at once.
+CATALOG_VERSION_KEY = 'catalog:version'
+
+# Products rendered on the catalog page; the rest is loaded page by page from /api/products
+CATALOG_PAGE_SIZE = 24
+API_MAX_PAGE_SIZE = 100
+
+# Fields /api/products can return (?fields=) and the columns each one reads
+_IMAGE_COLUMNS = (Product.id, Product.image_url, Product.image_hash, Product.image_size)
+API_FIELDS = {
+    'id': (Product.id,),
+    'name': (Product.name,),
+    'description': (Product.description,),
+    'category': (Product.category,),
+    'price': (Product.price,),
+    'stock_quantity': (Product.stock_quantity,),
+    'min_stock_level': (Product.min_stock_level,),
+    'in_stock': (Product.stock_quantity,),
+    'updated_at': (Product.updated_at,),
+    'image_url': _IMAGE_COLUMNS,
+    'thumb_url': _IMAGE_COLUMNS,
+}
+DEFAULT_API_FIELDS = ('id', 'name', 'category', 'price', 'stock_quantity', 'image_url')
+
+
+def get_catalog_version():
+    """Current catalog version number (0 if never invalidated)"""
+    return get_cache().get(CATALOG_VERSION_KEY) or 0
+
+
+def invalidate_catalog():
+    """Bump the catalog version so the next request rebuilds the cached catalog"""
+    try:
+        get_cache().incr(CATALOG_VERSION_KEY)
+    except Exception as e:
+        logging.error(f"Erro ao invalidar cache do catálogo: {e}")
+
+
+def _product_snapshot(product):
+    """Plain-dict copy of the product fields the catalog renders"""
+    from helpers import get_image_url
+    return {
+        'id': product.id,
+        'name': product.name,
+        'description': product.description,
+        'category': product.category,
+        'price': product.price,
+        'stock_quantity': product.stock_quantity,
+        'min_stock_level': product.min_stock_level,
+        'updated_at': product.updated_at.isoformat() if product.updated_at else None,
+        'image_src': get_image_url(product),
+    }
+
+
+def _load_catalog_products():
+    # One extra row tells whether the API has more pages
+    products = Product.query.options(
+        load_only(Product.id, Product.name, Product.description, Product.category,
+                  Product.price, Product.stock_quantity, Product.min_stock_level,
+                  Product.image_url, Product.image_hash, Product.image_size,
+                  Product.updated_at)
+    ).filter(Product.stock_quantity > 0).order_by(Product.id).limit(CATALOG_PAGE_SIZE + 1).all()
+    return [_product_snapshot(product) for product in products]
+
+
+def get_catalog_products():
+    """
+    First page of in-stock products for the catalog (plus one), as plain dicts.
+
+    Served from the cache under steady state; falls back to the database
+    if the cache backend is unavailable.
+    """
+    ttl = app.config.get('CATALOG_CACHE_TTL', 300)
+    try:
+        cache = get_cache()
+        key = f'catalog:products:v{get_catalog_version()}'
+        products = cache.get(key)
+        if products is None:
+            products = _load_catalog_products()
+            cache.set(key, products, ttl)
+        return products
+    except Exception as e:
+        logging.error(f"Erro no cache do catálogo, consultando o banco: {e}")
+        return _load_catalog_products()
+
+
+def _render_catalog(products):
+    next_cursor = None
+    if len(products) > CATALOG_PAGE_SIZE:
+        products = products[:CATALOG_PAGE_SIZE]
+        next_cursor = encode_cursor([products[-1]['id']])
+    return render_template('catalog_products.html', products=products, next_cursor=next_cursor)
+
+
+def get_catalog_html():
+    """Rendered first page of the catalog grid, cached like the product list"""
+    ttl = app.config.get('CATALOG_CACHE_TTL', 300)
+    try:
+        cache = get_cache()
+        key = f'catalog:html:v{get_catalog_version()}'
+        html = cache.get(key)
+        if html is None:
+            html = _render_catalog(get_catalog_products())
+            cache.set(key, html, ttl)
+        return Markup(html)
+    except Exception as e:
+        logging.error(f"Erro no cache do catálogo, renderizando sem cache: {e}")
+        return Markup(_render_catalog(_load_catalog_products()))
+
+
+def _parse_api_args(args):
+    """Normalized /api/products parameters; raises ValueError for invalid ones"""
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or list(DEFAULT_API_FIELDS)
+    unknown = [f for f in fields if f not in API_FIELDS]
+    if unknown:
+        raise ValueError(f"campos desconhecidos: {', '.join(unknown)}")
+
+    in_stock = args.get('in_stock', 'true').lower()
+    if in_stock not in ('true', 'false', 'all'):
+        raise ValueError('in_stock deve ser true, false ou all')
+
+    try:
+        limit = int(args.get('limit', CATALOG_PAGE_SIZE))
+        min_price = float(args['min_price']) if args.get('min_price') else None
+        max_price = float(args['max_price']) if args.get('max_price') else None
+    except ValueError:
+        raise ValueError('limit, min_price e max_price devem ser números')
+
+    return {
+        'fields': fields,
+        'category': args.get('category') or None,
+        'in_stock': in_stock,
+        'min_price': min_price,
+        'max_price': max_price,
+        'limit': max(1, min(limit, API_MAX_PAGE_SIZE)),
+        'after': args.get('after') or None,
+    }
+
+
+def _api_item(product, fields):
+    from helpers import get_image_url
+    item = {}
+    for field in fields:
+        if field == 'image_url':
+            item[field] = get_image_url(product, 'card')
+        elif field == 'thumb_url':
+            item[field] = get_image_url(product, 'thumb')
+        elif field == 'in_stock':
+            item[field] = (product.stock_quantity or 0) > 0
+        elif field == 'updated_at':
+            item[field] = product.updated_at.isoformat() if product.updated_at else None
+        else:
+            item[field] = getattr(product, field)
+    return item
+
+
+def _load_products_page(params):
+    columns = {column for field in params['fields'] for column in API_FIELDS[field]}
+    query = Product.query.options(load_only(*columns))
+    if params['in_stock'] == 'true':
+        query = query.filter(Product.stock_quantity > 0)
+    elif params['in_stock'] == 'false':
+        query = query.filter(Product.stock_quantity <= 0)
+    if params['category']:
+        query = query.filter(Product.category == params['category'])
+    if params['min_price'] is not None:
+        query = query.filter(Product.price >= params['min_price'])
+    if params['max_price'] is not None:
+        query = query.filter(Product.price <= params['max_price'])
+
+    page = keyset_paginate(query, (Product.id,), after=params['after'], per_page=params['limit'])
+    return {
+        'items': [_api_item(product, params['fields']) for product in page.items],
+        'next': page.next_cursor,
+    }
+
+
+def get_products_page(args):
+    """
+    One page of /api/products as compact JSON, with its ETag.
+
+    Pages are keyed by the catalog version and the normalized parameters,
+    so they are cached until the next product change. Returns a dict with
+    ``body`` and ``etag``; raises ValueError for invalid parameters.
+    """
+    params = _parse_api_args(args)
+    try:
+        cache = get_cache()
+        key = 'catalog:api:v{}:{}'.format(get_catalog_version(),
+                                          json.dumps(params, sort_keys=True, separators=(',', ':')))
+        page = cache.get(key)
+    except Exception as e:
+        logging.error(f"Erro no cache do catálogo, consultando o banco: {e}")
+        cache, page = None, None
+    if page is None:
+        body = json.dumps(_load_products_page(params), separators=(',', ':'), ensure_ascii=False)
+        page = {'body': body, 'etag': hashlib.sha1(body.encode()).hexdigest()[:20]}
+        if cache is not None:
+            try:
+                cache.set(key, page, app.config.get('CATALOG_CACHE_TTL', 300))
+            except Exception as e:
+                logging.error(f"Erro ao gravar página da API no cache: {e}")
+    return page
+
+
+# Invalidate automatically whenever a transaction that touched products commits.
+# This covers the admin CRUD, Flask-Admin views, stock adjustments and checkout.
+@event.listens_for(Session, 'after_flush')
+def _track_catalog_changes(session, flush_context):
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info['catalog_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_catalog_on_commit(session):
+    if session.info.pop('catalog_dirty', False):
+        invalidate_catalog()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_changes(session):
+    session.info.pop('catalog_dirty', None)
@@ -0,0 +1,166 @@
+import logging
+import urllib.parse
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import case, insert, update
+from app import db
+from models import Product, Order, OrderItem, StockMovement
+
+
+class CheckoutError(Exception):
+    """Checkout could not be completed; the message is safe to show to the customer"""
+
+
+class InsufficientStockError(CheckoutError):
+    def __init__(self, product_name, available):
+        self.product_name = product_name
+        self.available = available
+        super().__init__(
+            f'Estoque insuficiente para {product_name}. Apenas {available} disponíveis.')
+
+
+def place_order(cart_items, customer_name, customer_phone, cart_store):
+    """
+    Create an order from the cart in a single transaction.
+
+    Product rows are locked in id order (SELECT ... FOR UPDATE) so concurrent
+    checkouts of the same SKUs queue up instead of deadlocking, and stock is
+    decremented with one conditional UPDATE (stock_quantity >= n per line) so
+    it can never go negative even on databases that ignore row locks. The
+    number of statements does not depend on the number of cart lines.
+
+    The order, its items, the stock movements and the whatsapp_sent flag
+    are committed together; any failure rolls everything back and leaves
+    the cart untouched. The cart is only cleared once that commit succeeds.
+
+    Returns (order, whatsapp_url). The WhatsApp URL is built from the data
+    already in memory, so no query runs after the commit. Raises
+    InsufficientStockError when a product does not have enough stock.
+    """
+    # Merge lines per product, keeping a deterministic (id) order
+    quantities = OrderedDict()
+    for item in sorted(cart_items, key=lambda item: item.product_id):
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+
+    try:
+        # populate_existing refreshes products the cart already loaded with the locked values
+        locked = Product.query.filter(Product.id.in_(list(quantities))) \
+                              .order_by(Product.id) \
+                              .with_for_update() \
+                              .populate_existing() \
+                              .all()
+        products = {product.id: product for product in locked}
+
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                raise CheckoutError('Um dos produtos do carrinho não está mais disponível.')
+            if quantity > product.stock_quantity:
+                raise InsufficientStockError(product.name, product.stock_quantity)
+
+        # The customer is redirected to the WhatsApp URL right after the commit
+        order = Order(customer_name=customer_name,
+                      customer_phone=customer_phone,
+                      total_amount=sum(products[pid].price * qty for pid, qty in quantities.items()),
+                      whatsapp_sent=True)
+        db.session.add(order)
+        db.session.flush()  # Get the order ID
+
+        # Atomic decrement of every line in one statement: a row is only
+        # updated (and returned) if enough stock is still there
+        decrement = case(quantities, value=Product.id)
+        new_quantities = dict(db.session.execute(
+            update(Product)
+            .where(Product.id.in_(list(quantities)), Product.stock_quantity >= decrement)
+            .values(stock_quantity=Product.stock_quantity - decrement,
+                    in_stock=(Product.stock_quantity - decrement) > 0)
+            .returning(Product.id, Product.stock_quantity)
+            .execution_options(synchronize_session=False)
+        ).all())
+
+        order_items, movements, message_lines = [], [], []
+        for product_id, quantity in quantities.items():
+            product = products[product_id]
+            new_quantity = new_quantities.get(product_id)
+            if new_quantity is None:
+                raise InsufficientStockError(product.name, product.stock_quantity)
+
+            order_items.append(dict(order_id=order.id,
+                                    product_id=product_id,
+                                    quantity=quantity,
+                                    unit_price=product.price))
+            movements.append(dict(product_id=product_id,
+                                  movement_type='decrease',
+                                  quantity=quantity,
+                                  old_quantity=new_quantity + quantity,
+                                  new_quantity=new_quantity,
+                                  reason=f'Venda - Pedido #{order.id}',
+                                  reference_id=str(order.id),
+                                  created_at=datetime.utcnow()))
+            message_lines.append((product.name, quantity, product.price))
+
+        # Bulk executemany: the ORM would insert row by row to fetch each new id
+        db.session.execute(insert(OrderItem), order_items)
+        db.session.execute(insert(StockMovement), movements)
+
+        whatsapp_url = generate_whatsapp_message(order, message_lines)
+
+        order_id = order.id
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Só esvazia o carrinho depois que o pedido foi gravado; se a limpeza
+    # falhar o pedido continua válido e o cliente só vê o carrinho antigo
+    try:
+        cart_store.clear()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Erro ao limpar carrinho do pedido #{order_id}: {e}")
+
+    # Stock was changed with a bulk UPDATE, which the session hooks do not see
+    from catalog import invalidate_catalog
+    invalidate_catalog()
+
+    logging.info(f"Pedido #{order_id} criado com {len(quantities)} produtos")
+    return order, whatsapp_url
+
+
+def generate_whatsapp_message(order, items):
+    """Generate WhatsApp URL with order details
+
+    ``items`` is a list of (product_name, quantity, unit_price) tuples.
+    """
+    # WhatsApp number do vendedor
+    whatsapp_number = "5519996652616"
+
+    # Build message
+    message = f"🎯 *NOVO PEDIDO - VISAGE*\n\n"
+    message += f"👤 *Cliente:* {order.customer_name}\n"
+
+    if order.customer_phone:
+        message += f"📱 *Telefone:* {order.customer_phone}\n"
+
+    message += f"📝 *Pedido #{order.id}*\n\n"
+    message += "*🛍️ PRODUTOS:*\n"
+
+    for name, quantity, unit_price in items:
+        message += f"• {name}\n"
+        message += f"  Qtd: {quantity}x | R$ {unit_price:.2f} cada\n"
+        message += f"  Subtotal: R$ {unit_price * quantity:.2f}\n\n"
+
+    message += f"💰 *TOTAL: R$ {order.total_amount:.2f}*\n\n"
+    message += "✅ Obrigado por escolher Visage Distribuidora! Aguarde contato para combinar entrega/retirada."
+
+    # Encode message for URL
+    encoded_message = urllib.parse.quote(message)
+
+    # Generate WhatsApp URL
+    whatsapp_url = f"https://wa.me/{whatsapp_number}?text={encoded_message}"
+
+    logging.info(
+        f"WhatsApp URL generated for order {order.id}: {whatsapp_url}")
+
+    return whatsapp_url
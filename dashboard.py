@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime
+from sqlalchemy import func, select
+from app import app, db
+from cache import get_cache
+from models import Product, Order
+from reports import counted_orders
+
+DASHBOARD_CACHE_KEY = 'dashboard:stats'
+
+
+def _compute_dashboard_stats():
+    """All product and order aggregates in a single SELECT (COUNT ... FILTER)"""
+    in_stock = Product.stock_quantity > 0
+    low_stock = Product.stock_quantity <= Product.min_stock_level
+    out_of_stock = Product.stock_quantity == 0
+
+    row = db.session.execute(select(
+        func.count(Product.id),
+        func.count(Product.id).filter(in_stock),
+        func.count(Product.id).filter(low_stock),
+        func.count(Product.id).filter(out_of_stock),
+        func.coalesce(func.sum(Product.stock_quantity * Product.cost_price), 0),
+        func.coalesce(func.sum(Product.stock_quantity * Product.price), 0),
+        select(func.count(Order.id)).scalar_subquery(),
+        select(func.count(Order.id)).where(Order.status == 'pending').scalar_subquery(),
+        select(func.coalesce(func.sum(Order.total_amount), 0))
+        .where(*counted_orders(datetime.utcnow().date())).scalar_subquery(),
+    )).one()
+
+    return {
+        'total_products': row[0],
+        'products_in_stock': row[1],
+        'low_stock_products': row[2],
+        'out_of_stock': row[3],
+        'total_stock_value': float(row[4]),
+        'total_retail_value': float(row[5]),
+        'total_orders': row[6],
+        'pending_orders': row[7],
+        'sales_today': float(row[8]),
+    }
+
+
+def get_dashboard_stats():
+    """
+    Product and order totals shown on the admin dashboards.
+
+    Cached for DASHBOARD_CACHE_TTL seconds, so the numbers can lag behind
+    the database by up to that long; falls back to the database if the
+    cache backend is unavailable.
+    """
+    ttl = app.config.get('DASHBOARD_CACHE_TTL', 30)
+    try:
+        cache = get_cache()
+        stats = cache.get(DASHBOARD_CACHE_KEY)
+        if stats is None:
+            stats = _compute_dashboard_stats()
+            cache.set(DASHBOARD_CACHE_KEY, stats, ttl)
+        return stats
+    except Exception as e:
+        logging.error(f"Erro no cache do dashboard, consultando o banco: {e}")
+        return _compute_dashboard_stats()
@@ -0,0 +1,209 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+from app import db
+from models import Product, Order, OrderItem, StockMovement
+
+# Linhas buscadas por vez no cursor do servidor (psycopg2 usa um named cursor com yield_per)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _date_range(column, start, end):
+    filters = []
+    if start:
+        filters.append(column >= datetime.combine(start, time.min))
+    if end:
+        filters.append(column < datetime.combine(end + timedelta(days=1), time.min))
+    return filters
+
+
+def _orders_export(start, end, status):
+    """One row per order item; orders without items get a single row"""
+    stmt = select(
+        Order.id, Order.created_at, Order.status, Order.customer_name, Order.customer_phone,
+        Order.total_amount, OrderItem.product_id, Product.name, OrderItem.quantity,
+        OrderItem.unit_price, (OrderItem.quantity * OrderItem.unit_price)
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id) \
+     .outerjoin(Product, Product.id == OrderItem.product_id) \
+     .where(*_date_range(Order.created_at, start, end)) \
+     .order_by(Order.created_at, Order.id, OrderItem.id)
+    if status:
+        stmt = stmt.where(Order.status == status)
+    header = ['pedido', 'data', 'status', 'cliente', 'telefone', 'total_pedido',
+              'produto_id', 'produto', 'quantidade', 'preco_unitario', 'subtotal']
+    return header, stmt
+
+
+def _movements_export(start, end, status):
+    stmt = select(
+        StockMovement.id, StockMovement.created_at, StockMovement.product_id, Product.name,
+        StockMovement.movement_type, StockMovement.quantity, StockMovement.old_quantity,
+        StockMovement.new_quantity, StockMovement.reason, StockMovement.reference_id,
+        StockMovement.created_by
+    ).outerjoin(Product, Product.id == StockMovement.product_id) \
+     .where(*_date_range(StockMovement.created_at, start, end)) \
+     .order_by(StockMovement.created_at, StockMovement.id)
+    if status:
+        stmt = stmt.where(StockMovement.movement_type == status)
+    header = ['movimentacao', 'data', 'produto_id', 'produto', 'tipo', 'quantidade',
+              'estoque_anterior', 'estoque_novo', 'motivo', 'referencia', 'usuario']
+    return header, stmt
+
+
+def _inventory_export(start, end, status):
+    """Current stock per product; the date range filters by last update"""
+    stmt = select(
+        Product.id, Product.sku, Product.name, Product.category, Product.stock_quantity,
+        Product.min_stock_level, Product.cost_price, Product.price,
+        (Product.stock_quantity * Product.cost_price), Product.updated_at
+    ).where(*_date_range(Product.updated_at, start, end)).order_by(Product.id)
+    if status == 'out':
+        stmt = stmt.where(Product.stock_quantity <= 0)
+    elif status == 'low':
+        stmt = stmt.where(Product.stock_quantity > 0, Product.stock_quantity <= Product.min_stock_level)
+    elif status == 'in_stock':
+        stmt = stmt.where(Product.stock_quantity > 0)
+    header = ['produto_id', 'sku', 'produto', 'categoria', 'estoque', 'estoque_minimo',
+              'custo', 'preco', 'valor_estoque', 'atualizado_em']
+    return header, stmt
+
+
+EXPORTS = {
+    'orders': _orders_export,
+    'movements': _movements_export,
+    'inventory': _inventory_export,
+}
+
+
+def export_rows(kind, start=None, end=None, status=None):
+    """
+    Header and a row iterator for an export (orders, movements or inventory).
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time through a server-side
+    cursor, so memory does not grow with the size of the export.
+    """
+    header, stmt = EXPORTS[kind](start, end, status or None)
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    return header, (tuple(row) for row in result)
+
+
+# Spreadsheets run text starting with these as a formula (customer names come from the public checkout)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# Characters XML 1.0 does not allow; a single one makes Excel reject the whole workbook
+_XML_ILLEGAL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ', timespec='seconds') if isinstance(value, datetime) else value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    """Yield the CSV in chunks of EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM para o Excel reconhecer UTF-8
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_cell_text(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkWriter:
+    """Write-only, non-seekable file: zipfile then streams entries with data descriptors"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = _XML_ILLEGAL.sub('', str(_cell_text(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return '<row>' + ''.join(cells) + '</row>'
+
+
+def stream_xlsx(header, rows):
+    """
+    Yield a minimal XLSX workbook (one sheet, inline strings) as it is built.
+
+    The sheet XML is compressed into the zip while rows arrive, so no
+    dependency (openpyxl) and no temporary file are needed.
+    """
+    out = _ChunkWriter()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            sheet.write(_xlsx_row(header).encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % EXPORT_BATCH_SIZE == 0:
+                    yield out.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield out.drain()
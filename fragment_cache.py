@@ -0,0 +1,102 @@
+import sys
+import threading
+from collections import OrderedDict
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    In-process LRU of rendered template fragments, bounded by memory.
+
+    Entries are evicted least recently used first once their total size
+    (key plus HTML, as measured by sys.getsizeof) exceeds ``max_bytes``.
+    Keys must change whenever the fragment would render differently, so
+    entries never need to be invalidated.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, html):
+        size = sys.getsizeof(key) + sys.getsizeof(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._data[key] = (html, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = self.hits = self.misses = 0
+
+    def stats(self):
+        return {'entries': len(self._data), 'bytes': self.size, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+
+_fragment_cache = None
+
+
+def get_fragment_cache():
+    """Process-wide fragment cache sized by FRAGMENT_CACHE_MAX_BYTES (0 disables it)"""
+    global _fragment_cache
+    if _fragment_cache is None:
+        _fragment_cache = FragmentCache(current_app.config.get('FRAGMENT_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+    return _fragment_cache
+
+
+class FragmentCacheExtension(Extension):
+    """
+    ``{% cache 'name', key, ... %}...{% endcache %}`` for Jinja templates.
+
+    The block body is rendered once per distinct key and then served from
+    the fragment cache. Every value the body depends on must be part of
+    the key.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render_cached', [nodes.List(parts)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, parts, caller):
+        cache = get_fragment_cache()
+        if not cache.max_bytes:
+            return caller()
+        key = ':'.join(str(part) for part in parts)
+        html = cache.get(key)
+        if html is None:
+            html = str(caller())
+            cache.set(key, html)
+        return Markup(html)
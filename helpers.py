@@ -1,13 +1,21 @@
 import os
 from flask import request, url_for
 
-def get_image_url(product):
+def get_image_url(product, size='card'):
     """
     Get image URL for product - from database or fallback to placeholder
+    
+    ``size`` selects the stored variant (thumb, card or full). The URL carries
+    ``v=<hash>`` so browsers and CDNs can cache it forever; a new upload
+    changes the hash and therefore the URL.
     """
     # If product has image data in database, serve from database
-    if product.image_data:
-        return url_for('serve_product_image', product_id=product.id)
+    # (has_image uses the stored size so the deferred BLOB is never loaded here)
+    if product.has_image:
+        if product.image_version:
+            return url_for('serve_product_image', product_id=product.id, size=size,
+                           v=product.image_version)
+        return url_for('serve_product_image', product_id=product.id, size=size)
     
     # If it's an external URL (http/https), return as is
     if product.image_url and product.image_url.startswith(('http://', 'https://')):
@@ -0,0 +1,86 @@
+import io
+import logging
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional; sem ele a imagem original é armazenada
+    Image = None
+    ImageOps = None
+
+# Maximum dimension (px) of each stored variant
+IMAGE_VARIANTS = {
+    'thumb': 64,
+    'card': 300,
+    'full': 1600,
+}
+DEFAULT_VARIANT = 'full'
+
+IMAGE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def is_available():
+    """Check if Pillow is installed so variants can be generated"""
+    return Image is not None
+
+
+def _prepare(image):
+    """Apply EXIF orientation and normalize the color mode"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        return image.convert('RGBA')
+    return image.convert('RGB')
+
+
+def _encode(image, fmt):
+    """Encode an image without any metadata (EXIF, ICC, comments)"""
+    pil_format, _, options = IMAGE_FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode == 'RGBA':
+        # JPEG has no alpha channel: flatten over a white background
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    else:
+        image = image.copy()
+    # Drop source metadata so it is never written back
+    image.info = {}
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_variants(data):
+    """
+    Resize and recompress an uploaded image.
+
+    Returns a dict like {'thumb': {'webp': bytes, 'jpeg': bytes}, 'card': {...}, 'full': {...}},
+    or None if Pillow is missing or the bytes are not a readable image.
+    """
+    if not is_available():
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            base = _prepare(source)
+    except Exception as e:
+        logging.warning(f"Imagem inválida, variantes não geradas: {e}")
+        return None
+
+    variants = {}
+    # Largest first so each smaller size is resampled from an already reduced image
+    for name, max_size in sorted(IMAGE_VARIANTS.items(), key=lambda v: -v[1]):
+        resized = base.copy()
+        resized.thumbnail((max_size, max_size), Image.LANCZOS)
+        variants[name] = {fmt: _encode(resized, fmt) for fmt in IMAGE_FORMATS}
+        base = resized
+    return variants
+
+
+def pick_format(accept_header):
+    """Choose WebP when the client advertises support for it, JPEG otherwise"""
+    if accept_header and 'image/webp' in accept_header:
+        return 'webp'
+    return 'jpeg'
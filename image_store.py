@@ -0,0 +1,151 @@
+import os
+import hashlib
+import logging
+from app import app, db
+
+
+def compute_image_hash(data):
+    """Content hash used as the image key (sha256 hex)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ImageStore:
+    """
+    Content-addressed storage for product images.
+
+    Images are keyed by the sha256 of their bytes, so uploading the same
+    file twice stores it only once. Backends implement get/put/exists.
+    """
+
+    def put(self, data, mimetype=None):
+        """Store image bytes and return their content hash"""
+        raise NotImplementedError
+
+    def get(self, image_hash):
+        """Return (data, mimetype) for a hash, or (None, None) if missing"""
+        raise NotImplementedError
+
+    def exists(self, image_hash):
+        raise NotImplementedError
+
+
+class DatabaseImageStore(ImageStore):
+    """Stores images in the product_images table, outside the products rows"""
+
+    def put(self, data, mimetype=None):
+        from models import ProductImage
+        image_hash = compute_image_hash(data)
+        if db.session.get(ProductImage, image_hash) is None:
+            db.session.add(ProductImage(
+                hash=image_hash,
+                data=data,
+                mimetype=mimetype or 'image/jpeg',
+                size=len(data)
+            ))
+        return image_hash
+
+    def get(self, image_hash):
+        from models import ProductImage
+        image = db.session.get(ProductImage, image_hash)
+        if image is None:
+            return None, None
+        return image.data, image.mimetype
+
+    def exists(self, image_hash):
+        from models import ProductImage
+        return db.session.query(
+            db.session.query(ProductImage.hash).filter_by(hash=image_hash).exists()
+        ).scalar()
+
+
+class FilesystemImageStore(ImageStore):
+    """
+    Stores images as files under a base directory, fanned out by hash prefix.
+
+    Only usable where the filesystem is writable and shared (not on Vercel).
+    """
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+
+    def _path(self, image_hash):
+        return os.path.join(self.base_path, image_hash[:2], image_hash)
+
+    def put(self, data, mimetype=None):
+        image_hash = compute_image_hash(data)
+        path = self._path(image_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Escrita atômica: grava em arquivo temporário e renomeia
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            with open(f"{path}.mime", 'w') as f:
+                f.write(mimetype or 'image/jpeg')
+        return image_hash
+
+    def get(self, image_hash):
+        path = self._path(image_hash)
+        if not os.path.exists(path):
+            return None, None
+        with open(path, 'rb') as f:
+            data = f.read()
+        mimetype = 'image/jpeg'
+        if os.path.exists(f"{path}.mime"):
+            with open(f"{path}.mime") as f:
+                mimetype = f.read().strip() or mimetype
+        return data, mimetype
+
+    def exists(self, image_hash):
+        return os.path.exists(self._path(image_hash))
+
+
+_image_store = None
+
+
+def get_image_store():
+    """Return the configured image store backend (IMAGE_STORE_BACKEND)"""
+    global _image_store
+    if _image_store is None:
+        backend = app.config.get('IMAGE_STORE_BACKEND', 'database')
+        if backend == 'filesystem':
+            _image_store = FilesystemImageStore(app.config['IMAGE_STORE_PATH'])
+        else:
+            _image_store = DatabaseImageStore()
+    return _image_store
+
+
+def migrate_legacy_images(batch_size=20):
+    """
+    Move image bytes from products.image_data into the image store.
+
+    Runs in small batches so large BYTEA rows are never all in memory at once.
+    Returns the number of products migrated.
+    """
+    from models import Product
+    from sqlalchemy.orm import load_only, undefer
+
+    migrated = 0
+    while True:
+        products = Product.query.options(
+            load_only(Product.id, Product.image_mimetype, Product.image_filename, Product.image_hash),
+            undefer(Product.image_data)
+        ).filter(
+            Product.image_data.isnot(None),
+            Product.image_hash.is_(None)
+        ).limit(batch_size).all()
+
+        if not products:
+            break
+
+        for product in products:
+            # set_image also generates the resized variants and clears image_data
+            product.set_image(product.image_data, product.image_filename, product.image_mimetype)
+            migrated += 1
+
+        db.session.commit()
+
+    if migrated:
+        logging.info(f"{migrated} imagens migradas para o image store")
+    return migrated
@@ -1,5 +1,8 @@
 import os
-from app import app, init_database
+from app import create_app, init_database
+
+# Storefront plus the admin components listed in APP_COMPONENTS
+app = create_app()
 
 # Initialize database when running on Vercel
 try:
@@ -0,0 +1,246 @@
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app import db
+
+# Ordered schema migrations: (version, description, function).
+# Each one runs in its own transaction and bumps schema_version on commit.
+# Migrations must be idempotent: fresh databases get the current schema from
+# create_all() and then run every migration from version 1.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a schema migration; versions must be unique and increasing"""
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def current_version():
+    """Version recorded in schema_version, or 0 when the table is missing/empty"""
+    try:
+        return db.session.execute(text("SELECT version FROM schema_version")).scalar() or 0
+    except Exception:
+        db.session.rollback()
+        return 0
+
+
+def _set_version(version):
+    from models import SchemaVersion
+    sentinel = SchemaVersion.query.first()
+    if sentinel is None:
+        sentinel = SchemaVersion()
+        db.session.add(sentinel)
+    sentinel.version = version
+    sentinel.applied_at = datetime.utcnow()
+
+
+def apply_migrations():
+    """Apply every migration newer than the recorded version; returns how many ran"""
+    applied = 0
+    start = current_version()
+    for version, description, func in MIGRATIONS:
+        if version <= start:
+            continue
+        try:
+            func()
+            _set_version(version)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Migração {version} ({description}) falhou: {e}")
+            raise
+        print(f"✅ Migração {version}: {description}")
+        applied += 1
+    return applied
+
+
+def _has_column(table, column):
+    return column in {c['name'] for c in inspect(db.session.connection()).get_columns(table)}
+
+
+def _create_indexes(*names):
+    """Create indexes declared in models.py (by name) if they do not exist yet"""
+    indexes = {index.name: index
+               for table in db.metadata.tables.values()
+               for index in table.indexes}
+    for name in names:
+        indexes[name].create(bind=db.session.connection(), checkfirst=True)
+
+
+@migration(1, 'colunas de imagem e image store')
+def _image_columns():
+    if not _has_column('products', 'image_data'):
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_data BYTEA"))
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_filename VARCHAR(255)"))
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_mimetype VARCHAR(100)"))
+
+    # image_size lets catalog queries check for images without loading the BLOB
+    if not _has_column('products', 'image_size'):
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_size INTEGER"))
+        db.session.execute(text("""
+            UPDATE products SET image_size = octet_length(image_data)
+            WHERE image_data IS NOT NULL
+        """))
+
+    if not _has_column('products', 'image_hash'):
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_hash VARCHAR(64)"))
+
+    if not _has_column('products', 'image_variants'):
+        db.session.execute(text("ALTER TABLE products ADD COLUMN image_variants TEXT"))
+    db.session.commit()
+
+    # Move legacy BYTEA images into the content-addressed store (commits per batch)
+    from image_store import migrate_legacy_images
+    migrated = migrate_legacy_images()
+    if migrated:
+        print(f"✅ {migrated} imagens movidas para a tabela product_images")
+
+
+@migration(2, 'índices das consultas de carrinho, pedidos e estoque')
+def _lookup_indexes():
+    _create_indexes(
+        'ix_products_stock_quantity',
+        'ix_cart_items_product_id',
+        'ix_orders_status_created_at',
+        'ix_order_items_order_id',
+        'ix_stock_movements_product_created',
+        'ix_stock_alerts_product_resolved',
+    )
+    # orders/stock_movements created_at indexes now come from migration 5 as (created_at, id)
+
+
+@migration(3, 'carrinho único por (session_id, product_id)')
+def _unique_cart_lines():
+    # Keep the newest line of each duplicated product: add() sets the quantity,
+    # so the last row written holds what the customer chose
+    db.session.execute(text("""
+        DELETE FROM cart_items
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM cart_items GROUP BY session_id, product_id
+        )
+    """))
+    _create_indexes('uq_cart_items_session_product')
+
+
+@migration(4, 'tabelas de resumo diário de vendas e estoque')
+def _daily_rollups():
+    from models import DailySalesSummary, DailyProductSales, DailyStockSnapshot, RollupState
+    for model in (DailySalesSummary, DailyProductSales, DailyStockSnapshot, RollupState):
+        model.__table__.create(bind=db.session.connection(), checkfirst=True)
+    db.session.commit()
+
+    # Backfill: the first refresh folds in the whole order history once
+    from reports import refresh_sales_rollup, refresh_stock_snapshot
+    refresh_sales_rollup()
+    refresh_stock_snapshot()
+
+
+@migration(5, 'índices para paginação por cursor no admin')
+def _keyset_indexes():
+    _create_indexes('ix_products_name_id', 'ix_orders_created_id', 'ix_stock_movements_created_id')
+    # Superseded by the (created_at, id) indexes above
+    db.session.execute(text("DROP INDEX IF EXISTS ix_orders_created_at"))
+    db.session.execute(text("DROP INDEX IF EXISTS ix_stock_movements_created_at"))
+
+
+@migration(6, 'busca de produtos (tsvector e trigram no PostgreSQL)')
+def _product_search():
+    # Other databases search with the in-memory index of search.py
+    if db.engine.dialect.name != 'postgresql':
+        return
+    from search import SEARCH_VECTOR_SQL
+    if not _has_column('products', 'search_vector'):
+        # Generated column: PostgreSQL keeps it up to date on every INSERT/UPDATE
+        db.session.execute(text(f"ALTER TABLE products ADD COLUMN search_vector tsvector "
+                                f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"))
+    db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_products_search_vector "
+                            "ON products USING gin (search_vector)"))
+    # Typo tolerance needs pg_trgm; without permission to install it search still works
+    try:
+        with db.session.begin_nested():
+            db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name_trgm "
+                                    "ON products USING gin (lower(name) gin_trgm_ops)"))
+    except Exception as e:
+        logging.warning(f"pg_trgm indisponível, busca sem tolerância a erros de digitação: {e}")
+
+
+# Hot queries and the index each one should use (see explain_hot_queries)
+HOT_QUERIES = [
+    ('carrinho da sessão',
+     "SELECT * FROM cart_items WHERE session_id = 'x' ORDER BY id",
+     'uq_cart_items_session_product'),
+    ('linha do carrinho',
+     "SELECT * FROM cart_items WHERE session_id = 'x' AND product_id = 1",
+     'uq_cart_items_session_product'),
+    ('itens do pedido',
+     "SELECT * FROM order_items WHERE order_id = 1",
+     'ix_order_items_order_id'),
+    ('pedidos recentes',
+     "SELECT * FROM orders ORDER BY created_at DESC, id DESC LIMIT 20",
+     'ix_orders_created_id'),
+    ('pedidos pendentes',
+     "SELECT count(*) FROM orders WHERE status = 'pending'",
+     'ix_orders_status_created_at'),
+    ('movimentações do produto',
+     "SELECT * FROM stock_movements WHERE product_id = 1 ORDER BY created_at DESC",
+     'ix_stock_movements_product_created'),
+    ('movimentações recentes',
+     "SELECT * FROM stock_movements ORDER BY created_at DESC, id DESC LIMIT 5",
+     'ix_stock_movements_created_id'),
+    ('página seguinte de movimentações',
+     "SELECT * FROM stock_movements WHERE (created_at, id) < ('2024-01-01', 1000) "
+     "ORDER BY created_at DESC, id DESC LIMIT 21",
+     'ix_stock_movements_created_id'),
+    ('página seguinte de produtos',
+     "SELECT * FROM products WHERE (name, id) > ('M', 10) ORDER BY name, id LIMIT 21",
+     'ix_products_name_id'),
+    ('alertas abertos do produto',
+     "SELECT * FROM stock_alerts WHERE product_id = 1 AND is_resolved = false",
+     'ix_stock_alerts_product_resolved'),
+    ('catálogo em estoque',
+     "SELECT id FROM products WHERE stock_quantity > 0",
+     'ix_products_stock_quantity'),
+]
+
+# Hot queries that only exist on PostgreSQL (migration 6)
+POSTGRES_HOT_QUERIES = [
+    ('busca de produtos',
+     "SELECT id FROM products WHERE search_vector @@ to_tsquery('portuguese', 'pomada:*')",
+     'ix_products_search_vector'),
+    ('busca com erro de digitação',
+     "SELECT id FROM products WHERE lower(name) % 'pomda'",
+     'ix_products_name_trgm'),
+]
+
+
+def explain_hot_queries():
+    """
+    EXPLAIN each hot query and report whether it uses its expected index.
+
+    On PostgreSQL sequential scans are disabled for the check, so the result
+    reflects whether an index can serve the query even on small tables where
+    the planner would rightly prefer a seq scan. Returns a list of
+    (name, index, used, plan) tuples.
+    """
+    postgres = db.engine.dialect.name == 'postgresql'
+    results = []
+    try:
+        if postgres:
+            db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        for name, sql, index in HOT_QUERIES + (POSTGRES_HOT_QUERIES if postgres else []):
+            prefix = "EXPLAIN " if postgres else "EXPLAIN QUERY PLAN "
+            rows = db.session.execute(text(prefix + sql)).fetchall()
+            plan = "\n".join(str(row[-1]) for row in rows)
+            results.append((name, index, index in plan, plan))
+    finally:
+        db.session.rollback()
+    return results
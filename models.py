@@ -1,18 +1,27 @@
 from app import db
 from datetime import datetime
 from sqlalchemy import Text
+from sqlalchemy.orm import deferred
 from werkzeug.security import generate_password_hash, check_password_hash
+import json
 import uuid
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_stock_quantity', 'stock_quantity'),  # Catálogo filtra stock_quantity > 0
+        db.Index('ix_products_name_id', 'name', 'id'),  # Paginação por cursor no admin
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(255), nullable=True)
-    image_data = db.Column(db.LargeBinary, nullable=True)  # Store image as BLOB
+    image_data = deferred(db.Column(db.LargeBinary, nullable=True))  # Legado: bytes migrados para product_images
+    image_hash = db.Column(db.String(64), nullable=True)  # sha256 da imagem no image store
+    image_size = db.Column(db.Integer, nullable=True)  # Tamanho em bytes da imagem armazenada
+    image_variants = db.Column(Text, nullable=True)  # JSON {tamanho: {formato: hash}} das variantes geradas
     image_filename = db.Column(db.String(255), nullable=True)  # Original filename
     image_mimetype = db.Column(db.String(100), nullable=True)  # MIME type
     category = db.Column(db.String(50), nullable=True)
@@ -45,6 +54,59 @@ class Product(db.Model):
             self.sku = f"{name_part}-{unique_part}"
         return self.sku
     
+    @property
+    def has_image(self):
+        """Check if product has an image stored in the database without loading the BLOB"""
+        return bool(self.image_hash or self.image_size)
+    
+    def set_image(self, data, filename=None, mimetype=None):
+        """
+        Store uploaded image bytes in the image store and reference them by hash.
+        
+        When Pillow can read the image, resized WebP/JPEG variants are stored
+        instead of the original and the full-size JPEG becomes the main image.
+        """
+        from image_store import get_image_store
+        from image_pipeline import generate_variants, IMAGE_FORMATS
+        store = get_image_store()
+        self.image_data = None
+        self.image_filename = filename
+        self.image_variants = None
+        
+        if not data:
+            self.image_hash = None
+            self.image_size = None
+            self.image_mimetype = mimetype
+            return
+        
+        variants = generate_variants(data)
+        if variants:
+            hashes = {
+                size: {fmt: store.put(content, IMAGE_FORMATS[fmt][1]) for fmt, content in formats.items()}
+                for size, formats in variants.items()
+            }
+            self.image_variants = json.dumps(hashes)
+            self.image_hash = hashes['full']['jpeg']
+            self.image_size = len(variants['full']['jpeg'])
+            self.image_mimetype = 'image/jpeg'
+        else:
+            self.image_hash = store.put(data, mimetype)
+            self.image_size = len(data)
+            self.image_mimetype = mimetype
+    
+    @property
+    def image_version(self):
+        """Short version tag for image URLs, derived from the content hash"""
+        return self.image_hash[:16] if self.image_hash else None
+    
+    def get_image_hash(self, size='full', fmt='jpeg'):
+        """Return the stored hash for an image variant, falling back to the main image"""
+        if self.image_variants:
+            variants = json.loads(self.image_variants)
+            if size in variants and fmt in variants[size]:
+                return variants[size][fmt]
+        return self.image_hash
+    
     @property
     def is_low_stock(self):
         """Check if product is below minimum stock level"""
@@ -76,6 +138,11 @@ class Product(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        # Uma linha por produto em cada carrinho; também atende a busca por session_id
+        db.Index('uq_cart_items_session_product', 'session_id', 'product_id', unique=True),
+        db.Index('ix_cart_items_product_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.String(255), nullable=False)
@@ -95,6 +162,10 @@ class CartItem(db.Model):
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_created_id', 'created_at', 'id'),  # Recentes e paginação por cursor
+        db.Index('ix_orders_status_created_at', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_name = db.Column(db.String(100), nullable=False)
@@ -109,6 +180,9 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -126,6 +200,10 @@ class OrderItem(db.Model):
 
 class StockMovement(db.Model):
     __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_product_created', 'product_id', 'created_at'),
+        db.Index('ix_stock_movements_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -164,6 +242,9 @@ class Supplier(db.Model):
 
 class StockAlert(db.Model):
     __tablename__ = 'stock_alerts'
+    __table_args__ = (
+        db.Index('ix_stock_alerts_product_resolved', 'product_id', 'is_resolved'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
@@ -179,6 +260,19 @@ class StockAlert(db.Model):
     def __repr__(self):
         return f'<StockAlert {self.product.name}: {self.alert_type}>'
 
+class ProductImage(db.Model):
+    __tablename__ = 'product_images'
+    
+    # Content-addressed: the key is the sha256 of the bytes, so duplicates are stored once
+    hash = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    mimetype = db.Column(db.String(100), nullable=False, default='image/jpeg')
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ProductImage {self.hash[:12]} ({self.size} bytes)>'
+
 class AdminUser(db.Model):
     __tablename__ = 'admin_users'
     
@@ -199,3 +293,63 @@ class AdminUser(db.Model):
     
     def __repr__(self):
         return f'<AdminUser {self.username}>'
+
+class SchemaVersion(db.Model):
+    """Single-row sentinel holding the schema version applied by bootstrap.py"""
+    __tablename__ = 'schema_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaVersion {self.version}>'
+
+class DailySalesSummary(db.Model):
+    """Orders and revenue per day (UTC), maintained by reports.py"""
+    __tablename__ = 'daily_sales_summary'
+    
+    day = db.Column(db.Date, primary_key=True)
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<DailySalesSummary {self.day}: R$ {self.revenue:.2f}>'
+
+class DailyProductSales(db.Model):
+    """Units sold and revenue per product per day, maintained by reports.py"""
+    __tablename__ = 'daily_product_sales'
+    
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)  # Sem FK: o histórico sobrevive à exclusão do produto
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f'<DailyProductSales {self.day} #{self.product_id}: {self.units_sold}>'
+
+class DailyStockSnapshot(db.Model):
+    """End-of-day stock totals, refreshed while the day is current"""
+    __tablename__ = 'daily_stock_snapshot'
+    
+    day = db.Column(db.Date, primary_key=True)
+    total_units = db.Column(db.Integer, nullable=False, default=0)
+    stock_value = db.Column(db.Float, nullable=False, default=0.0)  # sum(stock_quantity * cost_price)
+    retail_value = db.Column(db.Float, nullable=False, default=0.0)  # sum(stock_quantity * price)
+    out_of_stock = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailyStockSnapshot {self.day}: R$ {self.stock_value:.2f}>'
+
+class RollupState(db.Model):
+    """High-water marks of the source rows already folded into the rollups"""
+    __tablename__ = 'rollup_state'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RollupState {self.name}: {self.last_id}>'
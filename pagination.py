@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    """Opaque URL-safe cursor for a row's sort key values"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Sort key values from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError('cursor inválido')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('cursor inválido')
+    return [_cursor_value(v, column) for v, column in zip(values, columns)]
+
+
+def _cursor_value(value, column):
+    """``value`` converted to ``column``'s Python type; ValueError if it does not fit"""
+    if value is None:
+        if column.nullable:
+            return None
+        raise ValueError('cursor inválido')
+    try:
+        python_type = column.type.python_type
+        # bool is an int subclass, but never a valid sort key here
+        if isinstance(value, bool):
+            raise ValueError
+        if python_type is datetime and isinstance(value, str):
+            return datetime.fromisoformat(value)
+        if python_type is float and isinstance(value, (int, float)):
+            return float(value)
+        if python_type in (int, str) and isinstance(value, python_type):
+            return value
+    except (TypeError, ValueError, NotImplementedError):
+        pass
+    raise ValueError('cursor inválido')
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, with cursors to its neighbours"""
+
+    def __init__(self, items, columns, has_next, has_prev):
+        self.items = items
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = self._cursor(items[-1], columns) if items and has_next else None
+        self.prev_cursor = self._cursor(items[0], columns) if items and has_prev else None
+
+    @staticmethod
+    def _cursor(item, columns):
+        return encode_cursor([getattr(item, column.key) for column in columns])
+
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=20, descending=False):
+    """
+    Paginate ``query`` by the unique key ``columns`` (e.g. (name, id)).
+
+    Instead of OFFSET, each page starts right after (or before) the key of
+    the row that ended the previous page, so any page costs O(per_page)
+    with an index on ``columns`` and no COUNT is needed. ``after`` and
+    ``before`` are cursors from a previous KeysetPage; invalid cursors
+    restart from the first page.
+    """
+    key = tuple_(*columns)
+    backwards = False
+    try:
+        if after:
+            values = tuple_(*decode_cursor(after, columns))
+            query = query.filter(key < values if descending else key > values)
+        elif before:
+            values = tuple_(*decode_cursor(before, columns))
+            query = query.filter(key > values if descending else key < values)
+            backwards = True
+    except ValueError:
+        after = before = None
+        backwards = False
+
+    # Walking backwards reads the preceding rows in reverse order
+    reverse = descending != backwards
+    query = query.order_by(*[column.desc() if reverse else column.asc() for column in columns])
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, columns, has_next=True, has_prev=has_more)
+    return KeysetPage(rows, columns, has_next=has_more, has_prev=bool(after))
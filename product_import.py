@@ -0,0 +1,258 @@
+import csv
+import io
+import logging
+import mimetypes
+import os
+import zipfile
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from models import Product, StockMovement
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl é opcional; sem ele só CSV é aceito
+    openpyxl = None
+
+# Produtos gravados por transação (um INSERT ... ON CONFLICT por lote)
+IMPORT_BATCH_SIZE = 500
+
+
+def _number(text):
+    # Aceita "1234.5" e o formato brasileiro "1.234,50"
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    value = float(text)
+    if value < 0:
+        raise ValueError
+    return value
+
+
+def _count(text):
+    value = _number(text)
+    if value != int(value):
+        raise ValueError
+    return int(value)
+
+
+# Column -> converter; blank cells keep the current value (or the default for new products)
+IMPORT_COLUMNS = {
+    'sku': str,
+    'name': str,
+    'description': str,
+    'category': str,
+    'supplier': str,
+    'price': _number,
+    'cost_price': _number,
+    'stock_quantity': _count,
+    'min_stock_level': _count,
+    'max_stock_level': _count,
+    'image_url': str,
+    'image_file': str,  # Nome do arquivo dentro do zip de imagens
+}
+
+NEW_PRODUCT_DEFAULTS = {
+    'description': None,
+    'category': None,
+    'supplier': None,
+    'cost_price': 0.0,
+    'stock_quantity': 0,
+    'min_stock_level': 5,
+    'max_stock_level': 100,
+    'image_url': None,
+}
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+
+def is_xlsx_available():
+    """Check if openpyxl is installed so XLSX files can be read"""
+    return openpyxl is not None
+
+
+def read_sheet(filename, data):
+    """Yield (line number, {column: text}) for each data row of a CSV or XLSX file"""
+    if filename.lower().endswith('.xlsx'):
+        if openpyxl is None:
+            raise ValueError('Instale o openpyxl para importar XLSX, ou envie um CSV')
+        workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        text = data.decode('utf-8-sig')
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t') if text.strip() else csv.excel
+        rows = csv.reader(io.StringIO(text), dialect)
+
+    header = None
+    for line, row in enumerate(rows, 1):
+        if header is None:
+            header = [str(cell or '').strip().lower() for cell in row]
+            continue
+        if not any(cell not in (None, '') for cell in row):
+            continue
+        yield line, {column: ('' if cell is None else str(cell).strip())
+                     for column, cell in zip(header, row) if column in IMPORT_COLUMNS}
+
+
+def read_image_zip(data):
+    """Map of lower-cased base file name -> bytes for the images in a zip"""
+    images = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename).lower()
+            if not info.is_dir() and os.path.splitext(name)[1] in IMAGE_EXTENSIONS:
+                images[name] = archive.read(info)
+    return images
+
+
+def _parse_row(cells):
+    """Convert the non-blank cells of a row; raises ValueError with a readable message"""
+    values = {}
+    for column, text in cells.items():
+        if text == '':
+            continue
+        try:
+            values[column] = IMPORT_COLUMNS[column](text)
+        except ValueError:
+            raise ValueError(f'valor inválido em {column}: {text}')
+    if not values.get('sku'):
+        raise ValueError('sku é obrigatório')
+    for column in ('sku', 'name', 'category', 'supplier', 'image_url'):
+        length = Product.__table__.c[column].type.length
+        if column in values and len(values[column]) > length:
+            raise ValueError(f'{column} tem mais de {length} caracteres')
+    return values
+
+
+def _upsert_statement(rows, columns):
+    """Dialect INSERT ... ON CONFLICT (sku) DO UPDATE for the given columns"""
+    dialect_insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    stmt = dialect_insert(Product).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={column: stmt.excluded[column] for column in columns if column not in ('sku', 'created_at')}
+    ).returning(Product.id, Product.sku, Product.stock_quantity)
+
+
+def _import_batch(batch, images, result, reference):
+    """Upsert one batch of (line, values) in a single transaction"""
+    skus = [values['sku'] for _, values in batch]
+    # Blank cells are written back with the values read here, so the rows stay
+    # locked (in id order, like checkout) until the batch commits; otherwise a
+    # checkout in between would have its stock decrement overwritten
+    try:
+        existing = {row.sku: row for row in db.session.execute(
+            select(Product.sku, Product.name, Product.price, Product.stock_quantity,
+                   *[getattr(Product, column) for column in NEW_PRODUCT_DEFAULTS if column != 'stock_quantity'])
+            .where(Product.sku.in_(skus))
+            .order_by(Product.id)
+            .with_for_update()
+        )}
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"[IMPORT] Erro ao ler produtos do lote: {e}")
+        result['errors'].extend((line, f'lote não importado: {e}') for line, _ in batch)
+        return
+
+    now = datetime.utcnow()
+    rows, image_files, lines = [], {}, {}
+    for line, values in batch:
+        current = existing.get(values['sku'])
+        if current is None and ('name' not in values or 'price' not in values):
+            result['errors'].append((line, 'produto novo precisa de name e price'))
+            continue
+        image_file = values.pop('image_file', None)
+        if image_file:
+            if image_file.lower() not in images:
+                result['errors'].append((line, f'imagem {image_file} não encontrada no zip'))
+                continue
+            image_files[values['sku']] = image_file
+        # Every row of one INSERT needs the same columns: blanks keep the current value
+        row = {column: getattr(current, column) if current is not None else default
+               for column, default in NEW_PRODUCT_DEFAULTS.items()}
+        if current is not None:
+            row.update(name=current.name, price=current.price)
+        row.update(values)
+        row.update(in_stock=row['stock_quantity'] > 0, updated_at=now, created_at=now)
+        rows.append(row)
+        lines[values['sku']] = line
+
+    if not rows:
+        return
+    try:
+        saved = db.session.execute(_upsert_statement(rows, rows[0].keys())).all()
+
+        movements = []
+        for product_id, sku, new_quantity in saved:
+            current = existing.get(sku)
+            old_quantity = (current.stock_quantity or 0) if current is not None else 0
+            if new_quantity != old_quantity:
+                movements.append(dict(product_id=product_id,
+                                      movement_type='increase' if new_quantity > old_quantity else 'decrease',
+                                      quantity=abs(new_quantity - old_quantity),
+                                      old_quantity=old_quantity,
+                                      new_quantity=new_quantity,
+                                      reason='Importação de produtos',
+                                      reference_id=reference,
+                                      created_at=now,
+                                      created_by='Importação'))
+        if movements:
+            db.session.execute(insert(StockMovement), movements)
+
+        if image_files:
+            ids = {sku: product_id for product_id, sku, _ in saved}
+            for product in Product.query.filter(Product.id.in_([ids[sku] for sku in image_files])):
+                filename = image_files[product.sku]
+                product.set_image(images[filename.lower()], filename,
+                                  mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+                product.image_url = None
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"[IMPORT] Erro no lote: {e}")
+        result['errors'].extend((lines[row['sku']], f'lote não importado: {e}') for row in rows)
+        return
+
+    result['created'] += sum(1 for _, sku, _ in saved if sku not in existing)
+    result['updated'] += sum(1 for _, sku, _ in saved if sku in existing)
+    result['movements'] += len(movements)
+
+
+def import_products(filename, data, images_zip=None):
+    """
+    Create or update products from a CSV/XLSX sheet, matching them by SKU.
+
+    Rows are validated first; valid rows are upserted IMPORT_BATCH_SIZE at
+    a time with one INSERT ... ON CONFLICT (sku) DO UPDATE and one bulk
+    insert of stock movements per batch, each batch in its own
+    transaction. ``images_zip`` maps the ``image_file`` column to images.
+    Returns counts and a list of (line, message) errors.
+    """
+    result = {'created': 0, 'updated': 0, 'movements': 0, 'errors': []}
+    images = read_image_zip(images_zip) if images_zip else {}
+
+    # Validate everything first; a repeated SKU keeps its last row
+    parsed = {}
+    for line, cells in read_sheet(filename, data):
+        try:
+            values = _parse_row(cells)
+        except ValueError as e:
+            result['errors'].append((line, str(e)))
+            continue
+        if values['sku'] in parsed:
+            result['errors'].append((parsed[values['sku']][0], f"sku {values['sku']} repetido na linha {line}; mantida a última"))
+        parsed[values['sku']] = (line, values)
+
+    reference = f"import-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+    batch = sorted(parsed.values(), key=lambda item: item[0])
+    for start in range(0, len(batch), IMPORT_BATCH_SIZE):
+        _import_batch(batch[start:start + IMPORT_BATCH_SIZE], images, result, reference)
+
+    # Bulk statements bypass the session hooks that invalidate the catalog
+    if result['created'] or result['updated']:
+        from catalog import invalidate_catalog
+        invalidate_catalog()
+
+    result['errors'].sort()
+    return result
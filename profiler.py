@@ -0,0 +1,164 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Endpoints not worth profiling (asset files never touch the database)
+IGNORED_ENDPOINTS = {'static', 'static_asset'}
+# Statements shown per request on the admin page and in the log line
+TOP_STATEMENTS = 5
+
+_history = deque()
+_history_lock = threading.Lock()
+_settings = {}
+
+
+class RequestProfile:
+    """SQL statements issued while handling one request, grouped by statement text"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = {}
+
+    def record(self, statement, parameters, duration):
+        self.count += 1
+        self.db_time += duration
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = {'count': 0, 'total': 0.0, 'max': 0.0, 'params': set()}
+        entry['count'] += 1
+        entry['total'] += duration
+        entry['max'] = max(entry['max'], duration)
+        if len(entry['params']) < 100:
+            entry['params'].add(hash(repr(parameters)))
+
+    def slowest(self):
+        return sorted(self.statements.items(), key=lambda item: -item[1]['max'])[:TOP_STATEMENTS]
+
+    def repeated(self, threshold):
+        """Statements run ``threshold`` times or more with different parameters (likely N+1)"""
+        return [(statement, entry) for statement, entry in self.statements.items()
+                if entry['count'] >= threshold and len(entry['params']) > 1]
+
+
+def _short(statement, length=200):
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    return statement if len(statement) <= length else statement[:length] + '…'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get('query_profile') is not None:
+        conn.info['profiler_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('profiler_started', None)
+    if started is not None and has_request_context() and g.get('query_profile') is not None:
+        g.query_profile.record(statement, parameters, time.perf_counter() - started)
+
+
+def _start_profile():
+    if request.endpoint not in IGNORED_ENDPOINTS:
+        g.query_profile = RequestProfile()
+
+
+def _finish_profile(response):
+    profile = g.pop('query_profile', None)
+    if profile is None:
+        return response
+    total_ms = (time.perf_counter() - profile.started) * 1000
+    db_ms = profile.db_time * 1000
+    response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{profile.count} queries"')
+    response.headers.add('Server-Timing', f'app;dur={total_ms:.1f}')
+
+    slow_ms = _settings['slow_ms']
+    slowest = [{'sql': _short(statement), 'count': entry['count'],
+                'max_ms': round(entry['max'] * 1000, 2), 'total_ms': round(entry['total'] * 1000, 2)}
+               for statement, entry in profile.slowest()]
+    repeated = [{'sql': _short(statement), 'count': entry['count'], 'total_ms': round(entry['total'] * 1000, 2)}
+                for statement, entry in profile.repeated(_settings['n_plus_one'])]
+    record = {
+        'at': datetime.utcnow().isoformat(timespec='seconds'),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'queries': profile.count,
+        'db_ms': round(db_ms, 2),
+        'total_ms': round(total_ms, 2),
+        'slow': [item for item in slowest if item['max_ms'] >= slow_ms],
+        'n_plus_one': repeated,
+    }
+    with _history_lock:
+        _history.append(dict(record, slowest=slowest))
+        while len(_history) > _settings['history']:
+            _history.popleft()
+
+    # Uma linha JSON por requisição, fácil de filtrar nos logs da Vercel
+    level = logging.WARNING if record['slow'] or repeated else logging.INFO
+    logging.log(level, f"query_profile {json.dumps(record, ensure_ascii=False)}")
+    return response
+
+
+def init_profiler(app):
+    """
+    Profile the SQL issued by every request (QUERY_PROFILER=1).
+
+    Adds a Server-Timing header (database time and query count, total
+    time), logs one JSON line per request and keeps the last
+    QUERY_PROFILER_HISTORY requests of this process for /admin/profiler.
+    Requests with statements slower than QUERY_PROFILER_SLOW_MS, or with
+    the same statement repeated QUERY_PROFILER_N_PLUS_ONE times or more
+    with different parameters, are logged as warnings.
+    """
+    if not app.config.get('QUERY_PROFILER') or _settings:
+        return
+    # Only hooked in here, so with the profiler off no query pays for it
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    _settings.update(slow_ms=app.config['QUERY_PROFILER_SLOW_MS'],
+                     n_plus_one=app.config['QUERY_PROFILER_N_PLUS_ONE'],
+                     history=app.config['QUERY_PROFILER_HISTORY'])
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    logging.info("Profiler de consultas SQL ativo")
+
+
+def is_profiler_enabled():
+    return bool(_settings)
+
+
+def get_profiles():
+    """Profiled requests of this process, most recent first"""
+    with _history_lock:
+        return list(reversed(_history))
+
+
+def summarize_profiles(profiles):
+    """Per-endpoint totals: requests, average/max queries, average/max DB and total time"""
+    endpoints = {}
+    for profile in profiles:
+        row = endpoints.setdefault(profile['endpoint'], {
+            'endpoint': profile['endpoint'], 'requests': 0, 'queries': 0, 'max_queries': 0,
+            'db_ms': 0.0, 'max_db_ms': 0.0, 'total_ms': 0.0, 'max_total_ms': 0.0, 'n_plus_one': 0})
+        row['requests'] += 1
+        row['queries'] += profile['queries']
+        row['max_queries'] = max(row['max_queries'], profile['queries'])
+        row['db_ms'] += profile['db_ms']
+        row['max_db_ms'] = max(row['max_db_ms'], profile['db_ms'])
+        row['total_ms'] += profile['total_ms']
+        row['max_total_ms'] = max(row['max_total_ms'], profile['total_ms'])
+        row['n_plus_one'] += bool(profile['n_plus_one'])
+    for row in endpoints.values():
+        row['avg_queries'] = row['queries'] / row['requests']
+        row['avg_db_ms'] = row['db_ms'] / row['requests']
+        row['avg_total_ms'] = row['total_ms'] / row['requests']
+    return sorted(endpoints.values(), key=lambda row: -row['db_ms'])
@@ -0,0 +1,172 @@
+import logging
+from datetime import datetime, time, timedelta
+from sqlalchemy import func, or_, select
+from app import db
+from models import (Product, Order, OrderItem, StockMovement, DailySalesSummary,
+                    DailyProductSales, DailyStockSnapshot, RollupState)
+
+# Pedidos cancelados não entram no faturamento
+EXCLUDED_ORDER_STATUSES = ('cancelled',)
+
+
+def _get_state(name):
+    state = db.session.get(RollupState, name)
+    if state is None:
+        state = RollupState(name=name, last_id=0)
+        db.session.add(state)
+    return state
+
+
+def counted_orders(day):
+    """Filters selecting the orders of a UTC day that count as sales"""
+    start = datetime.combine(day, time.min)
+    return (Order.created_at >= start,
+            Order.created_at < start + timedelta(days=1),
+            or_(Order.status.is_(None), Order.status.notin_(EXCLUDED_ORDER_STATUSES)))
+
+
+def rebuild_sales_day(day):
+    """Recompute the sales rollup rows of one day from orders/order_items"""
+    DailySalesSummary.query.filter_by(day=day).delete()
+    DailyProductSales.query.filter_by(day=day).delete()
+
+    counted = counted_orders(day)
+    orders_count, revenue = db.session.query(
+        func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0)
+    ).filter(*counted).one()
+    if not orders_count:
+        return
+
+    per_product = db.session.query(
+        OrderItem.product_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.unit_price)
+    ).join(Order, OrderItem.order_id == Order.id).filter(*counted) \
+     .group_by(OrderItem.product_id).all()
+
+    db.session.add(DailySalesSummary(day=day,
+                                     orders_count=orders_count,
+                                     units_sold=sum(units for _, units, _ in per_product),
+                                     revenue=float(revenue)))
+    db.session.add_all([DailyProductSales(day=day, product_id=product_id,
+                                          units_sold=units, revenue=float(product_revenue))
+                        for product_id, units, product_revenue in per_product])
+
+
+def _today_is_stale(today):
+    """True when today's summary misses orders (e.g. committed after a lower id was seen)"""
+    counted = db.session.query(func.count(Order.id)).filter(*counted_orders(today)).scalar()
+    summary = db.session.get(DailySalesSummary, today)
+    return counted != (summary.orders_count if summary else 0)
+
+
+def refresh_sales_rollup(days=()):
+    """
+    Fold orders created since the last refresh into daily_sales_summary.
+
+    Only the days touched by new orders are rebuilt, plus any ``days``
+    passed by the caller (e.g. after an order's status changed) and today
+    when its order count no longer matches the summary. Returns the number
+    of days rebuilt.
+    """
+    state = _get_state('sales')
+    new_orders = db.session.query(Order.id, Order.created_at).filter(Order.id > state.last_id).all()
+
+    touched = set(days) | {created_at.date() for _, created_at in new_orders if created_at}
+    today = datetime.utcnow().date()
+    if today not in touched and _today_is_stale(today):
+        touched.add(today)
+    for day in sorted(touched):
+        rebuild_sales_day(day)
+
+    if new_orders:
+        state.last_id = max(order_id for order_id, _ in new_orders)
+    if touched:
+        state.updated_at = datetime.utcnow()
+    db.session.commit()
+    return len(touched)
+
+
+def refresh_stock_snapshot():
+    """
+    Update today's stock snapshot when stock changed since the last refresh.
+
+    Stock changes are detected from new stock_movements rows and from
+    products.updated_at (admin edits change stock without a movement).
+    Earlier days keep the last values recorded while they were current.
+    """
+    state = _get_state('stock')
+    today = datetime.utcnow().date()
+    snapshot = db.session.get(DailyStockSnapshot, today)
+
+    last_movement_id, last_product_update = db.session.execute(select(
+        select(func.max(StockMovement.id)).scalar_subquery(),
+        select(func.max(Product.updated_at)).scalar_subquery(),
+    )).one()
+    last_movement_id = last_movement_id or 0
+
+    if (snapshot is not None and last_movement_id <= state.last_id
+            and (last_product_update is None or last_product_update <= snapshot.updated_at)):
+        return False
+
+    total_units, stock_value, retail_value, out_of_stock = db.session.query(
+        func.coalesce(func.sum(Product.stock_quantity), 0),
+        func.coalesce(func.sum(Product.stock_quantity * Product.cost_price), 0),
+        func.coalesce(func.sum(Product.stock_quantity * Product.price), 0),
+        func.count(Product.id).filter(Product.stock_quantity == 0),
+    ).one()
+
+    if snapshot is None:
+        snapshot = DailyStockSnapshot(day=today)
+        db.session.add(snapshot)
+    snapshot.total_units = total_units
+    snapshot.stock_value = float(stock_value)
+    snapshot.retail_value = float(retail_value)
+    snapshot.out_of_stock = out_of_stock
+    snapshot.updated_at = datetime.utcnow()
+
+    state.last_id = last_movement_id
+    state.updated_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def refresh_rollups():
+    """Refresh every rollup table; safe to call often (cron or report views)"""
+    try:
+        refresh_sales_rollup()
+        refresh_stock_snapshot()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Erro ao atualizar relatórios: {e}")
+
+
+def get_sales_report(start, end):
+    """
+    Daily sales, stock snapshots and top products between two dates (inclusive).
+
+    Reads only the rollup tables, so the cost depends on the number of days
+    in the range, not on the number of orders.
+    """
+    sales = DailySalesSummary.query.filter(DailySalesSummary.day.between(start, end)) \
+                                   .order_by(DailySalesSummary.day).all()
+    stock = DailyStockSnapshot.query.filter(DailyStockSnapshot.day.between(start, end)) \
+                                    .order_by(DailyStockSnapshot.day).all()
+    top_products = db.session.query(
+        DailyProductSales.product_id,
+        Product.name,
+        func.sum(DailyProductSales.units_sold).label('units_sold'),
+        func.sum(DailyProductSales.revenue).label('revenue')
+    ).outerjoin(Product, Product.id == DailyProductSales.product_id) \
+     .filter(DailyProductSales.day.between(start, end)) \
+     .group_by(DailyProductSales.product_id, Product.name) \
+     .order_by(func.sum(DailyProductSales.revenue).desc()).limit(10).all()
+
+    return {
+        'sales': sales,
+        'stock': stock,
+        'top_products': top_products,
+        'total_revenue': sum(row.revenue for row in sales),
+        'total_orders': sum(row.orders_count for row in sales),
+        'total_units': sum(row.units_sold for row in sales),
+    }
@@ -1,27 +1,50 @@
-from flask import render_template, redirect, url_for, flash, request, session, Response
+from flask import render_template, redirect, url_for, flash, request, Response, abort, jsonify
 from app import app, db
-from models import Product, CartItem, Order, OrderItem, StockMovement
-from forms import CheckoutForm, AddToCartForm
-import uuid
-import urllib.parse
+from models import Product
+from sqlalchemy.orm import load_only
+from forms import CheckoutForm
+from catalog import get_catalog_html, get_products_page
+from search import search_products
+from cart_store import get_cart_store
+from checkout_service import place_order, CheckoutError
+from assets import send_asset
 import logging
 
 
-def get_session_id():
-    """Get or create a session ID for the current user"""
-    if 'session_id' not in session:
-        session['session_id'] = str(uuid.uuid4())
-    return session['session_id']
-
-
 @app.route('/')
 def index():
     """Display the product catalog"""
-    products = Product.query.filter(Product.stock_quantity > 0).all()
-    cart_count = get_cart_count()
+    # Product grid comes from the catalog cache; no product query under steady state
+    catalog_html = get_catalog_html()
+    # cart_count comes from inject_cart_count (session, no query)
     return render_template('index.html',
-                           products=products,
-                           cart_count=cart_count)
+                           catalog_html=catalog_html)
+
+
+@app.route('/api/products')
+def api_products():
+    """
+    Read-only catalog JSON: ?category, ?in_stock (true|false|all),
+    ?min_price, ?max_price, ?fields=id,name,..., ?limit and ?after (cursor)
+    """
+    try:
+        page = get_products_page(request.args)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    
+    response = Response(page['body'], mimetype='application/json')
+    response.set_etag(page['etag'])
+    response.headers['Cache-Control'] = f"public, max-age={app.config['CATALOG_API_MAX_AGE']}"
+    return response.make_conditional(request)
+
+
+@app.route('/api/search')
+def api_search():
+    """Ranked product search with highlighted matches: ?q=texto&limit=20&in_stock=all"""
+    query = request.args.get('q', '').strip()[:100]
+    limit = request.args.get('limit', 20, type=int)
+    in_stock = request.args.get('in_stock', 'true').lower() != 'all'
+    return jsonify(search_products(query, limit=limit, in_stock=in_stock))
 
 
 @app.route('/add_to_cart/<int:product_id>', methods=['POST'])
@@ -29,7 +52,7 @@ def add_to_cart(product_id):
     """Add a product to the shopping cart"""
     try:
         product = Product.query.get_or_404(product_id)
-        session_id = get_session_id()
+        cart_store = get_cart_store()
 
         # Get quantity from form
         quantity = request.form.get('quantity', 1, type=int)
@@ -47,24 +70,17 @@ def add_to_cart(product_id):
             quantity = 99
 
         # Check if item already exists in cart
-        existing_item = CartItem.query.filter_by(
-            session_id=session_id, product_id=product_id).first()
-
-        if existing_item:
-            # Check total quantity doesn't exceed stock
-            total_quantity = existing_item.quantity + quantity
-            if total_quantity > product.stock_quantity:
-                flash(
-                    f'Quantidade total excede estoque disponível! Máximo: {product.stock_quantity}',
-                    'warning')
-                return redirect(url_for('index'))
-            existing_item.quantity = total_quantity
-        else:
-            cart_item = CartItem(session_id=session_id,
-                                 product_id=product_id,
-                                 quantity=quantity)
-            db.session.add(cart_item)
+        existing_quantity = cart_store.get_quantity(product_id)
+
+        # Check total quantity doesn't exceed stock
+        total_quantity = existing_quantity + quantity
+        if existing_quantity and total_quantity > product.stock_quantity:
+            flash(
+                f'Quantidade total excede estoque disponível! Máximo: {product.stock_quantity}',
+                'warning')
+            return redirect(url_for('index'))
 
+        cart_store.add(product_id, total_quantity)
         db.session.commit()
         flash(f'{product.name} adicionado ao carrinho!', 'success')
         logging.info(
@@ -80,8 +96,7 @@ def add_to_cart(product_id):
 @app.route('/cart')
 def cart():
     """Display the shopping cart"""
-    session_id = get_session_id()
-    cart_items = CartItem.query.filter_by(session_id=session_id).all()
+    cart_items = get_cart_store().items()
 
     total = sum(item.total_price for item in cart_items)
     cart_count = len(cart_items)
@@ -95,12 +110,11 @@ def cart():
 @app.route('/remove_from_cart/<int:item_id>')
 def remove_from_cart(item_id):
     """Remove an item from the cart"""
-    session_id = get_session_id()
-    cart_item = CartItem.query.filter_by(id=item_id,
-                                         session_id=session_id).first_or_404()
+    cart_item = get_cart_store().remove(item_id)
+    if cart_item is None:
+        abort(404)
 
     product_name = cart_item.product.name
-    db.session.delete(cart_item)
     db.session.commit()
 
     flash(f'{product_name} removido do carrinho!', 'info')
@@ -110,13 +124,13 @@ def remove_from_cart(item_id):
 @app.route('/update_cart/<int:item_id>', methods=['POST'])
 def update_cart(item_id):
     """Update the quantity of an item in the cart"""
-    session_id = get_session_id()
-    cart_item = CartItem.query.filter_by(id=item_id,
-                                         session_id=session_id).first_or_404()
+    cart_store = get_cart_store()
+    if cart_store.get_line(item_id) is None:
+        abort(404)
 
     new_quantity = request.form.get('quantity', type=int)
     if new_quantity and new_quantity > 0:
-        cart_item.quantity = new_quantity
+        cart_store.set_quantity(item_id, new_quantity)
         db.session.commit()
         flash('Quantidade atualizada!', 'success')
     else:
@@ -128,8 +142,8 @@ def update_cart(item_id):
 @app.route('/checkout', methods=['GET', 'POST'])
 def checkout():
     """Handle the checkout process"""
-    session_id = get_session_id()
-    cart_items = CartItem.query.filter_by(session_id=session_id).all()
+    cart_store = get_cart_store()
+    cart_items = cart_store.items()
 
     if not cart_items:
         flash('Seu carrinho está vazio!', 'warning')
@@ -140,53 +154,21 @@ def checkout():
 
     if form.validate_on_submit():
         try:
-            # Create order
-            order = Order(customer_name=form.customer_name.data,
-                          customer_phone=form.customer_phone.data,
-                          total_amount=total)
-            db.session.add(order)
-            db.session.flush()  # Get the order ID
-
-            # Create order items and update stock
-            for cart_item in cart_items:
-                product = cart_item.product
-
-                # Check stock availability before processing
-                if cart_item.quantity > product.stock_quantity:
-                    flash(
-                        f'Estoque insuficiente para {product.name}. Apenas {product.stock_quantity} disponíveis.',
-                        'error')
-                    return redirect(url_for('cart'))
-
-                order_item = OrderItem(order_id=order.id,
-                                       product_id=cart_item.product_id,
-                                       quantity=cart_item.quantity,
-                                       unit_price=cart_item.product.price)
-                db.session.add(order_item)
-
-                # Update stock quantity using the model method
-                movement = product.update_stock(-cart_item.quantity,
-                                                f'Venda - Pedido #{order.id}')
-                movement.reference_id = str(order.id)
-
-            # Clear cart
-            for cart_item in cart_items:
-                db.session.delete(cart_item)
-
-            db.session.commit()
-
-            # Generate WhatsApp message
-            whatsapp_url = generate_whatsapp_message(order)
-
-            # Mark order as WhatsApp sent
-            order.whatsapp_sent = True
-            db.session.commit()
+            # Order, items, stock movements, cart clear and the WhatsApp flag
+            # in one locked transaction; the URL is built from in-memory data
+            order, whatsapp_url = place_order(cart_items,
+                                              form.customer_name.data,
+                                              form.customer_phone.data,
+                                              cart_store)
 
             flash(
                 'Pedido finalizado! Você será redirecionado para o WhatsApp.',
                 'success')
             return redirect(whatsapp_url)
 
+        except CheckoutError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('cart'))
         except Exception as e:
             db.session.rollback()
             logging.error(f"Erro no checkout: {e}")
@@ -201,45 +183,13 @@ def checkout():
                            cart_count=cart_count)
 
 
-def generate_whatsapp_message(order):
-    """Generate WhatsApp URL with order details"""
-    # WhatsApp number do vendedor
-    whatsapp_number = "5519996652616"
-
-    # Build message
-    message = f"🎯 *NOVO PEDIDO - VISAGE*\n\n"
-    message += f"👤 *Cliente:* {order.customer_name}\n"
-
-    if order.customer_phone:
-        message += f"📱 *Telefone:* {order.customer_phone}\n"
-
-    message += f"📝 *Pedido #{order.id}*\n\n"
-    message += "*🛍️ PRODUTOS:*\n"
-
-    for item in order.items:
-        message += f"• {item.product.name}\n"
-        message += f"  Qtd: {item.quantity}x | R$ {item.unit_price:.2f} cada\n"
-        message += f"  Subtotal: R$ {item.total_price:.2f}\n\n"
-
-    message += f"💰 *TOTAL: R$ {order.total_amount:.2f}*\n\n"
-    message += "✅ Obrigado por escolher Visage Distribuidora! Aguarde contato para combinar entrega/retirada."
-
-    # Encode message for URL
-    encoded_message = urllib.parse.quote(message)
-
-    # Generate WhatsApp URL
-    whatsapp_url = f"https://wa.me/{whatsapp_number}?text={encoded_message}"
-
-    logging.info(
-        f"WhatsApp URL generated for order {order.id}: {whatsapp_url}")
-
-    return whatsapp_url
-
-
 def get_cart_count():
-    """Get the number of items in the current user's cart"""
-    session_id = get_session_id()
-    return CartItem.query.filter_by(session_id=session_id).count()
+    """Get the number of items in the current user's cart
+    
+    Both cart backends answer from the signed session, so the navbar badge
+    costs no query.
+    """
+    return get_cart_store().count()
 
 
 @app.context_processor
@@ -251,8 +201,7 @@ def inject_cart_count():
 @app.route('/clear_cart')
 def clear_cart():
     """Clear all items from the cart"""
-    session_id = get_session_id()
-    CartItem.query.filter_by(session_id=session_id).delete()
+    get_cart_store().clear()
     db.session.commit()
 
     flash('Carrinho limpo!', 'info')
@@ -261,67 +210,73 @@ def clear_cart():
 
 @app.route('/product_image/<int:product_id>')
 def serve_product_image(product_id):
-    """Serve product image from database"""
+    """Serve product image from the image store
+    
+    The optional ``size`` query parameter (thumb, card, full) picks a resized
+    variant; WebP is served to clients that accept it. Responses carry a strong
+    ETag (the content hash) so revalidations are answered with 304 before the
+    image bytes are read, and URLs versioned with ``v`` are cached as immutable.
+    """
+    from image_pipeline import IMAGE_VARIANTS, DEFAULT_VARIANT, pick_format
+    from werkzeug.http import is_resource_modified
     try:
-        product = Product.query.get_or_404(product_id)
+        size = request.args.get('size', DEFAULT_VARIANT)
+        if size not in IMAGE_VARIANTS:
+            size = DEFAULT_VARIANT
+        fmt = pick_format(request.headers.get('Accept'))
+        
+        # Only the image reference columns are loaded; the bytes live in the image store
+        product = Product.query.options(
+            load_only(Product.id, Product.image_hash, Product.image_variants,
+                      Product.image_mimetype, Product.image_filename, Product.updated_at)
+        ).filter_by(id=product_id).first_or_404()
+        
+        headers = {
+            'Content-Disposition': f'inline; filename="{product.image_filename or "product.jpg"}"',
+            'Cache-Control': 'public, max-age=3600',  # Cache for 1 hour
+            'Vary': 'Accept'
+        }
+        
+        image_data, mimetype = None, product.image_mimetype
+        if product.image_hash:
+            image_hash = product.get_image_hash(size, fmt)
+            
+            # A URL carrying the current version never changes content: cache it for a year
+            if request.args.get('v') == product.image_version:
+                headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            
+            # Answer revalidations from the hash alone, without reading the image bytes
+            if not is_resource_modified(request.environ, etag=image_hash,
+                                        last_modified=product.updated_at):
+                response = Response(status=304, headers=headers)
+                response.set_etag(image_hash)
+                return response
+            
+            from image_store import get_image_store
+            image_data, stored_mimetype = get_image_store().get(image_hash)
+            mimetype = stored_mimetype or mimetype
+        else:
+            # Legacy rows not yet migrated still keep the bytes in products.image_data
+            image_data = product.image_data
+            image_hash = None
         
-        if not product.image_data:
+        if not image_data:
             # Redirect to placeholder if no image data
             return redirect('https://via.placeholder.com/300x300/8B4513/FFFFFF?text=Produto')
         
         # Serve image from database
-        return Response(
-            product.image_data,
-            mimetype=product.image_mimetype or 'image/jpeg',
-            headers={
-                'Content-Disposition': f'inline; filename="{product.image_filename or "product.jpg"}"',
-                'Cache-Control': 'public, max-age=3600'  # Cache for 1 hour
-            }
-        )
+        response = Response(image_data, mimetype=mimetype or 'image/jpeg', headers=headers)
+        if image_hash:
+            response.set_etag(image_hash)
+            response.last_modified = product.updated_at
+        return response
     except Exception as e:
         logging.error(f"Erro ao servir imagem do produto {product_id}: {e}")
         return redirect('https://via.placeholder.com/300x300/8B4513/FFFFFF?text=Produto')
 
 
-# Static file serving route for Vercel compatibility
-@app.route('/static/<path:filename>')
-def serve_static_files(filename):
-    """Serve static files for Vercel deployment"""
-    import os
-    from flask import send_from_directory, Response
-    
-    try:
-        # Get the absolute path to the static directory
-        static_dir = os.path.join(os.path.dirname(__file__), 'static')
-        
-        # Check if file exists
-        file_path = os.path.join(static_dir, filename)
-        if not os.path.exists(file_path):
-            logging.warning(f"Arquivo estático não encontrado: {filename}")
-            from flask import abort
-            abort(404)
-        
-        # Set proper content type based on file extension
-        content_type = 'text/plain'
-        if filename.endswith('.css'):
-            content_type = 'text/css'
-        elif filename.endswith('.js'):
-            content_type = 'application/javascript'
-        elif filename.endswith('.png'):
-            content_type = 'image/png'
-        elif filename.endswith('.jpg') or filename.endswith('.jpeg'):
-            content_type = 'image/jpeg'
-        elif filename.endswith('.gif'):
-            content_type = 'image/gif'
-        elif filename.endswith('.svg'):
-            content_type = 'image/svg+xml'
-        
-        response = send_from_directory(static_dir, filename)
-        response.headers['Content-Type'] = content_type
-        response.headers['Cache-Control'] = 'public, max-age=3600'
-        return response
-        
-    except Exception as e:
-        logging.error(f"Erro ao servir arquivo estático {filename}: {e}")
-        from flask import abort
-        abort(404)
+# Fingerprinted assets from `flask build-assets`; everything else in static/
+# is served by Flask's own static handler (or directly by Vercel)
+@app.route('/static/dist/<path:filename>')
+def static_asset(filename):
+    return send_asset(filename)
@@ -0,0 +1,272 @@
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import load_only
+from app import app, db
+from models import Product
+
+# Maintained by PostgreSQL itself (generated column, migration 6). Name and SKU
+# weigh the most, then category, supplier and description.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('portuguese', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(sku, '')), 'A') || "
+    "setweight(to_tsvector('portuguese', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(supplier, '')), 'C') || "
+    "setweight(to_tsvector('portuguese', coalesce(description, '')), 'D')"
+)
+
+# Same weights for the in-memory index used when the database is not PostgreSQL
+FIELD_WEIGHTS = {'name': 1.0, 'sku': 1.0, 'category': 0.4, 'supplier': 0.2, 'description': 0.1}
+# Minimum trigram similarity for a typo to match (pg_trgm's default threshold)
+SIMILARITY_THRESHOLD = 0.3
+SEARCH_MAX_RESULTS = 50
+SNIPPET_LENGTH = 160
+
+_RESULT_COLUMNS = (Product.id, Product.name, Product.description, Product.category, Product.price,
+                   Product.stock_quantity, Product.min_stock_level, Product.image_url,
+                   Product.image_hash, Product.image_size)
+
+
+def fold(value):
+    """Lower-case and strip accents, one output char per input char (so offsets still match)"""
+    if value.isascii():
+        return value.lower()
+    return ''.join(unicodedata.normalize('NFD', ch)[0].lower() for ch in value)
+
+
+def tokenize(value):
+    return re.findall(r'\w+', fold(value or ''))
+
+
+@lru_cache(maxsize=8192)
+def _trigrams(token):
+    padded = f'  {token} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _similarity(a, b):
+    ta, tb = _trigrams(a), _trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index over the searchable product fields.
+
+    Query terms match whole tokens, token prefixes (as-you-type) and, when
+    neither exists, tokens within SIMILARITY_THRESHOLD trigram similarity.
+    Every term must match; scores add up the field weights.
+    """
+
+    def __init__(self, rows):
+        self.postings = {}
+        self.stock = {}
+        for row in rows:
+            self.stock[row.id] = row.stock_quantity or 0
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(getattr(row, field)):
+                    posting = self.postings.setdefault(token, {})
+                    posting[row.id] = max(posting.get(row.id, 0), weight)
+        self.tokens = sorted(self.postings)
+        self.trigrams = {}
+        for token in self.tokens:
+            for trigram in _trigrams(token):
+                self.trigrams.setdefault(trigram, set()).add(token)
+
+    def _matches(self, term):
+        """{token: quality} for one query term"""
+        matches = {}
+        start = bisect.bisect_left(self.tokens, term)
+        for token in self.tokens[start:]:
+            if not token.startswith(term):
+                break
+            matches[token] = 1.0 if token == term else 0.8
+        if len(term) < 3:
+            return matches
+        # Typos: "pomda" -> "pomada"; also catches near forms like "pomade"
+        candidates = set().union(*(self.trigrams.get(t, ()) for t in _trigrams(term)))
+        for token in candidates - matches.keys():
+            similarity = _similarity(term, token)
+            if similarity >= SIMILARITY_THRESHOLD:
+                matches[token] = 0.6 * similarity
+        return matches
+
+    def search(self, terms, limit, in_stock=True):
+        scores = None
+        for term in terms:
+            term_scores = {}
+            for token, quality in self._matches(term).items():
+                for product_id, weight in self.postings[token].items():
+                    term_scores[product_id] = max(term_scores.get(product_id, 0), weight * quality)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pid: score + term_scores[pid] for pid, score in scores.items() if pid in term_scores}
+            if not scores:
+                return []
+        if in_stock:
+            scores = {pid: score for pid, score in scores.items() if self.stock[pid] > 0}
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+_postgres_search = None
+
+
+def get_index():
+    """
+    In-memory index for the current catalog version.
+
+    Rebuilt after product changes and, because another worker's changes
+    only bump its own in-process version, at least every SEARCH_INDEX_TTL
+    seconds.
+    """
+    global _index
+    from catalog import get_catalog_version
+    version = get_catalog_version()
+    ttl = app.config.get('SEARCH_INDEX_TTL', 60)
+    with _index_lock:
+        if _index is None or _index[0] != version or time.monotonic() - _index[1] >= ttl:
+            rows = db.session.query(Product.id, Product.name, Product.sku, Product.category,
+                                    Product.supplier, Product.description, Product.stock_quantity).all()
+            _index = (version, time.monotonic(), InvertedIndex(rows))
+        return _index[2]
+
+
+def _use_postgres():
+    """True when the products.search_vector column from migration 6 exists"""
+    global _postgres_search
+    if _postgres_search is None:
+        _postgres_search = db.engine.dialect.name == 'postgresql' and bool(db.session.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'products' AND column_name = 'search_vector'"
+        )).scalar())
+        if _postgres_search:
+            _postgres_search = {'trigram': bool(db.session.execute(text(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar())}
+    return _postgres_search
+
+
+def _search_postgres(query, limit, in_stock, options):
+    # Accents are kept here: the Portuguese dictionary indexes "pós", not "pos"
+    terms = re.findall(r'\w+', query.lower())[:8]
+    stock_filter = "AND stock_quantity > 0" if in_stock else ""
+    # Prefix match on every term: "pom sua" finds "Pomada Suavecito"
+    ranked = db.session.execute(text(f"""
+        SELECT id, ts_rank_cd(search_vector, query) AS rank
+        FROM products, to_tsquery('portuguese', :query) AS query
+        WHERE search_vector @@ query {stock_filter}
+        ORDER BY rank DESC, id
+        LIMIT :limit
+    """), {'query': ' & '.join(f'{term}:*' for term in terms), 'limit': limit}).all()
+
+    if len(ranked) < limit and options['trigram']:
+        # Typos: trigram similarity on the name, ranked below every full-text hit
+        found = [row.id for row in ranked] or [0]
+        fuzzy = db.session.execute(text(f"""
+            SELECT id, similarity(lower(name), :term) * 0.01 AS rank
+            FROM products
+            WHERE lower(name) % :term AND id NOT IN :found {stock_filter}
+            ORDER BY rank DESC, id
+            LIMIT :limit
+        """).bindparams(bindparam('found', expanding=True)),
+            {'term': ' '.join(terms), 'found': found, 'limit': limit - len(ranked)}).all()
+        ranked += fuzzy
+    return [(row.id, float(row.rank)) for row in ranked]
+
+
+def _matches_term(word, terms):
+    return any(word.startswith(term) or (len(term) >= 3 and _similarity(term, word) >= SIMILARITY_THRESHOLD)
+               for term in terms)
+
+
+def highlight(value, terms):
+    """HTML-escaped ``value`` with the words matching a query term (prefix or typo) wrapped in <mark>"""
+    if not value:
+        return Markup('')
+    parts, last = [], 0
+    for match in re.finditer(r'\w+', fold(value)):
+        if _matches_term(match.group(), terms):
+            parts.append(escape(value[last:match.start()]))
+            parts.append(Markup('<mark>%s</mark>') % value[match.start():match.end()])
+            last = match.end()
+    parts.append(escape(value[last:]))
+    return Markup('').join(parts)
+
+
+def snippet(value, terms, length=SNIPPET_LENGTH):
+    """Highlighted excerpt of ``value`` around the first match"""
+    if not value:
+        return Markup('')
+    first = next((m.start() for m in re.finditer(r'\w+', fold(value)) if _matches_term(m.group(), terms)), 0)
+    start = max(0, first - length // 3)
+    excerpt = value[start:start + length]
+    return (Markup('…') if start else Markup('')) + highlight(excerpt, terms) + \
+           (Markup('…') if start + length < len(value) else Markup(''))
+
+
+def search_products(query, limit=20, in_stock=True):
+    """
+    Ranked product search over name, SKU, category, supplier and description.
+
+    Uses the tsvector/trigram indexes on PostgreSQL and the in-memory
+    inverted index elsewhere. Returns a dict with the results (product
+    fields plus highlighted name/description), the backend and the time
+    taken in ms.
+    """
+    started = time.perf_counter()
+    terms = tokenize(query)[:8]
+    limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+    backend = 'memory'
+    ranked = []
+    if terms:
+        try:
+            options = _use_postgres()
+            if options:
+                backend = 'postgresql'
+                ranked = _search_postgres(query, limit, in_stock, options)
+            else:
+                ranked = get_index().search(terms, limit, in_stock)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erro na busca ({backend}): {e}")
+            ranked = []
+
+    from helpers import get_image_url
+    products = {}
+    if ranked:
+        products = {p.id: p for p in Product.query.options(load_only(*_RESULT_COLUMNS))
+                    .filter(Product.id.in_([pid for pid, _ in ranked]))}
+    items = []
+    for product_id, rank in ranked:
+        product = products.get(product_id)
+        if product is None:
+            continue
+        items.append({
+            'id': product.id,
+            'name': product.name,
+            'description': product.description,
+            'category': product.category,
+            'price': product.price,
+            'stock_quantity': product.stock_quantity,
+            'min_stock_level': product.min_stock_level,
+            'image_url': get_image_url(product, 'card'),
+            'rank': round(rank, 4),
+            'highlight': {
+                'name': str(highlight(product.name, terms)),
+                'description': str(snippet(product.description, terms)),
+            },
+        })
+    return {
+        'query': query,
+        'items': items,
+        'backend': backend,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
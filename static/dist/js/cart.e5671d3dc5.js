@@ -0,0 +1,506 @@
+// Cart Management JavaScript
+
+class BarbershopCart {
+    constructor() {
+        this.init();
+    }
+
+    init() {
+        this.bindEvents();
+        this.updateCartUI();
+        this.initializeTooltips();
+    }
+
+    bindEvents() {
+        // Add to cart form submissions
+        document.addEventListener('submit', (e) => {
+            if (e.target.classList.contains('add-to-cart-form')) {
+                this.handleAddToCart(e);
+            }
+        });
+
+        // Quantity updates
+        document.addEventListener('change', (e) => {
+            if (e.target.classList.contains('quantity-input')) {
+                this.handleQuantityChange(e);
+            }
+        });
+
+        // Remove from cart confirmations
+        document.addEventListener('click', (e) => {
+            if (e.target.closest('[data-action="remove-item"]')) {
+                this.handleRemoveItem(e);
+            }
+        });
+
+        // Clear cart confirmation
+        document.addEventListener('click', (e) => {
+            if (e.target.closest('[data-action="clear-cart"]')) {
+                this.handleClearCart(e);
+            }
+        });
+
+        // Checkout form validation
+        const checkoutForm = document.getElementById('checkoutForm');
+        if (checkoutForm) {
+            checkoutForm.addEventListener('submit', this.handleCheckout.bind(this));
+        }
+    }
+
+    handleAddToCart(e) {
+        const form = e.target;
+        const button = form.querySelector('button[type="submit"]');
+        const originalText = button.innerHTML;
+        
+        // Show loading state
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Adicionando...';
+        button.disabled = true;
+
+        // Add animation to button
+        button.classList.add('btn-pulse');
+
+        // Simulate network delay for better UX
+        setTimeout(() => {
+            button.innerHTML = '<i class="fas fa-check me-2"></i>Adicionado!';
+            button.classList.remove('btn-pulse');
+            button.classList.add('btn-success');
+            
+            setTimeout(() => {
+                button.innerHTML = originalText;
+                button.classList.remove('btn-success');
+                button.disabled = false;
+            }, 1500);
+        }, 500);
+    }
+
+    handleQuantityChange(e) {
+        const input = e.target;
+        const quantity = parseInt(input.value);
+        
+        if (quantity < 1) {
+            input.value = 1;
+            this.showAlert('Quantidade mínima é 1', 'warning');
+            return;
+        }
+        
+        if (quantity > 99) {
+            input.value = 99;
+            this.showAlert('Quantidade máxima é 99', 'warning');
+            return;
+        }
+
+        // Add visual feedback
+        input.style.backgroundColor = '#d4edda';
+        setTimeout(() => {
+            input.style.backgroundColor = '';
+        }, 300);
+
+        this.debounce(() => {
+            this.updateCartTotals();
+        }, 500)();
+    }
+
+    handleRemoveItem(e) {
+        e.preventDefault();
+        
+        const link = e.target.closest('a');
+        const productName = link.dataset.productName || 'este item';
+        
+        if (confirm(`Tem certeza que deseja remover "${productName}" do carrinho?`)) {
+            // Add removal animation
+            const cartItem = link.closest('.cart-item');
+            if (cartItem) {
+                cartItem.style.transform = 'translateX(-100%)';
+                cartItem.style.opacity = '0';
+                
+                setTimeout(() => {
+                    window.location.href = link.href;
+                }, 300);
+            } else {
+                window.location.href = link.href;
+            }
+        }
+    }
+
+    handleClearCart(e) {
+        e.preventDefault();
+        
+        if (confirm('Tem certeza que deseja limpar todo o carrinho?')) {
+            window.location.href = e.target.href;
+        }
+    }
+
+    handleCheckout(e) {
+        const form = e.target;
+        const submitButton = form.querySelector('button[type="submit"]');
+        
+        // Validate required fields
+        const nameInput = form.querySelector('#customer_name');
+        if (!nameInput.value.trim()) {
+            nameInput.focus();
+            this.showAlert('Por favor, preencha seu nome', 'error');
+            e.preventDefault();
+            return;
+        }
+
+        // Show loading state
+        const originalText = submitButton.innerHTML;
+        submitButton.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Preparando WhatsApp...';
+        submitButton.disabled = true;
+
+        // Add success animation
+        setTimeout(() => {
+            submitButton.innerHTML = '<i class="fab fa-whatsapp me-2"></i>Redirecionando...';
+        }, 1000);
+    }
+
+    updateCartTotals() {
+        // This would be called after quantity changes to update totals
+        // In a real app, you might make an AJAX call here
+        console.log('Updating cart totals...');
+    }
+
+    updateCartUI() {
+        // Update cart counter in navbar
+        const cartBadges = document.querySelectorAll('.cart-count');
+        // This would be updated based on actual cart contents
+    }
+
+    initializeTooltips() {
+        // Initialize Bootstrap tooltips
+        const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+        tooltipTriggerList.map(function (tooltipTriggerEl) {
+            return new bootstrap.Tooltip(tooltipTriggerEl);
+        });
+    }
+
+    showAlert(message, type = 'info') {
+        // Create and show custom alert
+        const alertDiv = document.createElement('div');
+        alertDiv.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+        alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+        
+        const icon = this.getAlertIcon(type);
+        
+        alertDiv.innerHTML = `
+            <i class="${icon} me-2"></i>
+            ${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        `;
+        
+        document.body.appendChild(alertDiv);
+        
+        // Auto-remove after 5 seconds
+        setTimeout(() => {
+            if (alertDiv.parentNode) {
+                alertDiv.remove();
+            }
+        }, 5000);
+    }
+
+    getAlertIcon(type) {
+        const icons = {
+            'success': 'fas fa-check-circle',
+            'error': 'fas fa-exclamation-triangle',
+            'warning': 'fas fa-exclamation-circle',
+            'info': 'fas fa-info-circle'
+        };
+        return icons[type] || icons.info;
+    }
+
+    debounce(func, wait) {
+        let timeout;
+        return function executedFunction(...args) {
+            const later = () => {
+                clearTimeout(timeout);
+                func(...args);
+            };
+            clearTimeout(timeout);
+            timeout = setTimeout(later, wait);
+        };
+    }
+}
+
+// Utility Functions
+const BarbershopUtils = {
+    formatPrice(price) {
+        return new Intl.NumberFormat('pt-BR', {
+            style: 'currency',
+            currency: 'BRL'
+        }).format(price);
+    },
+
+    formatPhone(phone) {
+        const cleaned = phone.replace(/\D/g, '');
+        if (cleaned.length === 11) {
+            return cleaned.replace(/(\d{2})(\d{5})(\d{4})/, '($1) $2-$3');
+        } else if (cleaned.length === 10) {
+            return cleaned.replace(/(\d{2})(\d{4})(\d{4})/, '($1) $2-$3');
+        }
+        return phone;
+    },
+
+    validateEmail(email) {
+        const re = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+        return re.test(email);
+    },
+
+    validatePhone(phone) {
+        const cleaned = phone.replace(/\D/g, '');
+        return cleaned.length >= 10 && cleaned.length <= 11;
+    }
+};
+
+// Custom CSS Animations
+const style = document.createElement('style');
+style.textContent = `
+    .btn-pulse {
+        animation: pulse 0.5s infinite;
+    }
+    
+    @keyframes pulse {
+        0% { transform: scale(1); }
+        50% { transform: scale(1.05); }
+        100% { transform: scale(1); }
+    }
+    
+    .cart-item {
+        transition: all 0.3s ease;
+    }
+    
+    .fade-out {
+        opacity: 0;
+        transform: translateX(-100%);
+    }
+    
+    .loading-overlay {
+        position: fixed;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 100%;
+        background: rgba(0, 0, 0, 0.5);
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        z-index: 9999;
+    }
+    
+    .loading-spinner {
+        background: white;
+        padding: 2rem;
+        border-radius: 10px;
+        text-align: center;
+    }
+`;
+document.head.appendChild(style);
+
+// Initialize when DOM is loaded
+document.addEventListener('DOMContentLoaded', () => {
+    new BarbershopCart();
+    
+    // Initialize other features
+    initializeProductFilters();
+    initializeCatalogPaging();
+    initializeProductSearch();
+    initializeImageLazyLoading();
+    initializeScrollAnimations();
+});
+
+// Product Filters (for future enhancement)
+function initializeProductFilters() {
+    const filterButtons = document.querySelectorAll('[data-filter]');
+    filterButtons.forEach(button => {
+        button.addEventListener('click', (e) => {
+            const filter = e.target.dataset.filter;
+            filterProducts(filter);
+        });
+    });
+}
+
+function filterProducts(category) {
+    const products = document.querySelectorAll('.product-card');
+    products.forEach(product => {
+        const productCategory = product.dataset.category;
+        if (category === 'all' || productCategory === category) {
+            product.style.display = 'block';
+            product.classList.add('fade-in-up');
+        } else {
+            product.style.display = 'none';
+        }
+    });
+}
+
+// Catalog paging: the page ships the first products, the rest comes from /api/products
+const CATALOG_API_FIELDS = 'id,name,description,category,price,stock_quantity,min_stock_level,image_url';
+const PLACEHOLDER_IMAGE = 'https://via.placeholder.com/300x300/8B4513/FFFFFF?text=Produto';
+
+function initializeCatalogPaging() {
+    const grid = document.getElementById('catalog-grid');
+    const button = document.getElementById('load-more-products');
+    if (!grid || !button) return;
+
+    button.addEventListener('click', async () => {
+        const cursor = grid.dataset.nextCursor;
+        if (!cursor) return;
+        const originalText = button.innerHTML;
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Carregando...';
+
+        try {
+            const params = new URLSearchParams({ fields: CATALOG_API_FIELDS, after: cursor });
+            const response = await fetch(`/api/products?${params}`, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const page = await response.json();
+
+            page.items.forEach(product => grid.appendChild(renderProductCard(product)));
+            grid.dataset.nextCursor = page.next || '';
+            if (!page.next) {
+                button.parentElement.remove();
+                return;
+            }
+        } catch (error) {
+            console.error('Erro ao carregar produtos:', error);
+        }
+        button.disabled = false;
+        button.innerHTML = originalText;
+    });
+}
+
+// Search: results replace the catalog while the box has text
+function initializeProductSearch() {
+    const input = document.getElementById('product-search');
+    const results = document.getElementById('search-results');
+    const grid = document.getElementById('search-grid');
+    const empty = document.getElementById('search-empty');
+    const catalog = document.getElementById('catalog-products');
+    if (!input || !results) return;
+
+    let lastQuery = '';
+    const search = BarbershopCart.prototype.debounce(async () => {
+        const query = input.value.trim();
+        if (query === lastQuery) return;
+        lastQuery = query;
+        if (query.length < 2) {
+            results.classList.add('d-none');
+            catalog.classList.remove('d-none');
+            return;
+        }
+        try {
+            const response = await fetch(`/api/search?${new URLSearchParams({ q: query })}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const data = await response.json();
+            if (query !== lastQuery) return;  // a newer search already started
+
+            grid.replaceChildren(...data.items.map(product => renderProductCard(product)));
+            empty.classList.toggle('d-none', data.items.length > 0);
+            catalog.classList.add('d-none');
+            results.classList.remove('d-none');
+        } catch (error) {
+            console.error('Erro na busca:', error);
+        }
+    }, 250);
+    input.addEventListener('input', search);
+}
+
+const HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+
+// Safe for text and for quoted attribute values (data-category, alt, src)
+function escapeHtml(value) {
+    return (value == null ? '' : String(value)).replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
+}
+
+// Same markup as templates/catalog_products.html; search results carry server-escaped highlights
+function renderProductCard(product) {
+    const stock = Number(product.stock_quantity) || 0;
+    let badge;
+    if (stock <= product.min_stock_level) {
+        badge = `<span class="badge bg-warning text-dark"><i class="fas fa-exclamation me-1"></i>Últimas ${stock}</span>`;
+    } else if (stock <= 10) {
+        badge = `<span class="badge bg-info"><i class="fas fa-info me-1"></i>${stock} disponíveis</span>`;
+    } else {
+        badge = '<span class="badge bg-success"><i class="fas fa-check me-1"></i>Em Estoque</span>';
+    }
+    const highlight = product.highlight || {};
+    const name = highlight.name || escapeHtml(product.name);
+    let description = '';
+    if (highlight.description) {
+        description = `<p class="card-text text-muted flex-grow-1">${highlight.description}</p>`;
+    } else if (product.description) {
+        description = `<p class="card-text text-muted flex-grow-1">${escapeHtml(product.description.slice(0, 100))}${product.description.length > 100 ? '...' : ''}</p>`;
+    }
+    const category = product.category
+        ? `<span class="badge position-absolute top-0 end-0 m-2" style="background: rgba(212, 175, 55, 0.2) !important; color: #D4AF37 !important; border: 1px solid #D4AF37 !important;">${escapeHtml(product.category)}</span>`
+        : '';
+
+    const column = document.createElement('div');
+    column.className = 'col-lg-4 col-md-6';
+    column.innerHTML = `
+        <div class="card h-100 shadow-sm product-card fade-in-up" data-category="${escapeHtml(product.category)}">
+            <div class="card-img-top-wrapper">
+                <img src="${escapeHtml(product.image_url)}" class="card-img-top" alt="${escapeHtml(product.name)}"
+                     style="height: 250px; object-fit: cover;" loading="lazy"
+                     onerror="this.src='${PLACEHOLDER_IMAGE}'">
+                ${category}
+            </div>
+            <div class="card-body d-flex flex-column">
+                <h5 class="card-title fw-bold">${name}</h5>
+                ${description}
+                <div class="d-flex justify-content-between align-items-center mb-3">
+                    <span class="h4 text-success fw-bold mb-0">R$ ${Number(product.price).toFixed(2)}</span>
+                    ${badge}
+                </div>
+                <form method="POST" action="/add_to_cart/${Number(product.id)}" class="add-to-cart-form">
+                    <div class="input-group mb-3">
+                        <span class="input-group-text"><i class="fas fa-calculator"></i></span>
+                        <input type="number" name="quantity" class="form-control" value="1" min="1"
+                               max="${stock}" aria-label="Quantidade">
+                        <button class="btn btn-primary" type="submit">
+                            <i class="fas fa-cart-plus me-2"></i>
+                            Adicionar
+                        </button>
+                    </div>
+                </form>
+            </div>
+        </div>`;
+    return column;
+}
+
+// Image Lazy Loading
+function initializeImageLazyLoading() {
+    if ('IntersectionObserver' in window) {
+        const imageObserver = new IntersectionObserver((entries, observer) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    const img = entry.target;
+                    img.src = img.dataset.src;
+                    img.classList.remove('lazy');
+                    imageObserver.unobserve(img);
+                }
+            });
+        });
+
+        const lazyImages = document.querySelectorAll('img[data-src]');
+        lazyImages.forEach(img => imageObserver.observe(img));
+    }
+}
+
+// Scroll Animations
+function initializeScrollAnimations() {
+    if ('IntersectionObserver' in window) {
+        const animationObserver = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    entry.target.classList.add('fade-in-up');
+                }
+            });
+        }, { threshold: 0.1 });
+
+        const animatedElements = document.querySelectorAll('.animate-on-scroll');
+        animatedElements.forEach(el => animationObserver.observe(el));
+    }
+}
+
+// Export for use in other scripts
+window.BarbershopCart = BarbershopCart;
+window.BarbershopUtils = BarbershopUtils;
@@ -301,6 +301,8 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Initialize other features
     initializeProductFilters();
+    initializeCatalogPaging();
+    initializeProductSearch();
     initializeImageLazyLoading();
     initializeScrollAnimations();
 });
@@ -329,6 +331,141 @@ function filterProducts(category) {
     });
 }
 
+// Catalog paging: the page ships the first products, the rest comes from /api/products
+const CATALOG_API_FIELDS = 'id,name,description,category,price,stock_quantity,min_stock_level,image_url';
+const PLACEHOLDER_IMAGE = 'https://via.placeholder.com/300x300/8B4513/FFFFFF?text=Produto';
+
+function initializeCatalogPaging() {
+    const grid = document.getElementById('catalog-grid');
+    const button = document.getElementById('load-more-products');
+    if (!grid || !button) return;
+
+    button.addEventListener('click', async () => {
+        const cursor = grid.dataset.nextCursor;
+        if (!cursor) return;
+        const originalText = button.innerHTML;
+        button.disabled = true;
+        button.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Carregando...';
+
+        try {
+            const params = new URLSearchParams({ fields: CATALOG_API_FIELDS, after: cursor });
+            const response = await fetch(`/api/products?${params}`, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const page = await response.json();
+
+            page.items.forEach(product => grid.appendChild(renderProductCard(product)));
+            grid.dataset.nextCursor = page.next || '';
+            if (!page.next) {
+                button.parentElement.remove();
+                return;
+            }
+        } catch (error) {
+            console.error('Erro ao carregar produtos:', error);
+        }
+        button.disabled = false;
+        button.innerHTML = originalText;
+    });
+}
+
+// Search: results replace the catalog while the box has text
+function initializeProductSearch() {
+    const input = document.getElementById('product-search');
+    const results = document.getElementById('search-results');
+    const grid = document.getElementById('search-grid');
+    const empty = document.getElementById('search-empty');
+    const catalog = document.getElementById('catalog-products');
+    if (!input || !results) return;
+
+    let lastQuery = '';
+    const search = BarbershopCart.prototype.debounce(async () => {
+        const query = input.value.trim();
+        if (query === lastQuery) return;
+        lastQuery = query;
+        if (query.length < 2) {
+            results.classList.add('d-none');
+            catalog.classList.remove('d-none');
+            return;
+        }
+        try {
+            const response = await fetch(`/api/search?${new URLSearchParams({ q: query })}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const data = await response.json();
+            if (query !== lastQuery) return;  // a newer search already started
+
+            grid.replaceChildren(...data.items.map(product => renderProductCard(product)));
+            empty.classList.toggle('d-none', data.items.length > 0);
+            catalog.classList.add('d-none');
+            results.classList.remove('d-none');
+        } catch (error) {
+            console.error('Erro na busca:', error);
+        }
+    }, 250);
+    input.addEventListener('input', search);
+}
+
+const HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+
+// Safe for text and for quoted attribute values (data-category, alt, src)
+function escapeHtml(value) {
+    return (value == null ? '' : String(value)).replace(/[&<>"']/g, ch => HTML_ESCAPES[ch]);
+}
+
+// Same markup as templates/catalog_products.html; search results carry server-escaped highlights
+function renderProductCard(product) {
+    const stock = Number(product.stock_quantity) || 0;
+    let badge;
+    if (stock <= product.min_stock_level) {
+        badge = `<span class="badge bg-warning text-dark"><i class="fas fa-exclamation me-1"></i>Últimas ${stock}</span>`;
+    } else if (stock <= 10) {
+        badge = `<span class="badge bg-info"><i class="fas fa-info me-1"></i>${stock} disponíveis</span>`;
+    } else {
+        badge = '<span class="badge bg-success"><i class="fas fa-check me-1"></i>Em Estoque</span>';
+    }
+    const highlight = product.highlight || {};
+    const name = highlight.name || escapeHtml(product.name);
+    let description = '';
+    if (highlight.description) {
+        description = `<p class="card-text text-muted flex-grow-1">${highlight.description}</p>`;
+    } else if (product.description) {
+        description = `<p class="card-text text-muted flex-grow-1">${escapeHtml(product.description.slice(0, 100))}${product.description.length > 100 ? '...' : ''}</p>`;
+    }
+    const category = product.category
+        ? `<span class="badge position-absolute top-0 end-0 m-2" style="background: rgba(212, 175, 55, 0.2) !important; color: #D4AF37 !important; border: 1px solid #D4AF37 !important;">${escapeHtml(product.category)}</span>`
+        : '';
+
+    const column = document.createElement('div');
+    column.className = 'col-lg-4 col-md-6';
+    column.innerHTML = `
+        <div class="card h-100 shadow-sm product-card fade-in-up" data-category="${escapeHtml(product.category)}">
+            <div class="card-img-top-wrapper">
+                <img src="${escapeHtml(product.image_url)}" class="card-img-top" alt="${escapeHtml(product.name)}"
+                     style="height: 250px; object-fit: cover;" loading="lazy"
+                     onerror="this.src='${PLACEHOLDER_IMAGE}'">
+                ${category}
+            </div>
+            <div class="card-body d-flex flex-column">
+                <h5 class="card-title fw-bold">${name}</h5>
+                ${description}
+                <div class="d-flex justify-content-between align-items-center mb-3">
+                    <span class="h4 text-success fw-bold mb-0">R$ ${Number(product.price).toFixed(2)}</span>
+                    ${badge}
+                </div>
+                <form method="POST" action="/add_to_cart/${Number(product.id)}" class="add-to-cart-form">
+                    <div class="input-group mb-3">
+                        <span class="input-group-text"><i class="fas fa-calculator"></i></span>
+                        <input type="number" name="quantity" class="form-control" value="1" min="1"
+                               max="${stock}" aria-label="Quantidade">
+                        <button class="btn btn-primary" type="submit">
+                            <i class="fas fa-cart-plus me-2"></i>
+                            Adicionar
+                        </button>
+                    </div>
+                </form>
+            </div>
+        </div>`;
+    return column;
+}
+
 // Image Lazy Loading
 function initializeImageLazyLoading() {
     if ('IntersectionObserver' in window) {
@@ -0,0 +1,169 @@
+import csv
+import io
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import case, insert, or_, select, update
+from app import db
+from models import Product, StockMovement, StockAlert
+
+REASON_MAX_LENGTH = StockMovement.__table__.c.reason.type.length
+
+
+class StockAdjustmentError(Exception):
+    """Adjustment rejected; ``errors`` lists (line, message) and nothing was applied"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f'linha {line}: {message}' for line, message in errors))
+
+
+def parse_adjustment_lines(text):
+    """
+    Parse ``produto;quantidade;motivo`` lines (comma, semicolon or tab).
+
+    ``produto`` is a SKU or a product id. Returns a list of
+    (line, identifier, delta, reason); raises StockAdjustmentError when a
+    line is malformed.
+    """
+    lines, errors = [], []
+    rows = csv.reader(io.StringIO(text.replace('\t', ';')), delimiter=';' if ';' in text or '\t' in text else ',')
+    for line, row in enumerate(rows, 1):
+        row = [cell.strip() for cell in row]
+        if not any(row) or row[0].startswith('#'):
+            continue
+        if len(row) < 2 or not row[0]:
+            errors.append((line, 'use produto;quantidade;motivo'))
+            continue
+        try:
+            delta = int(row[1])
+        except ValueError:
+            errors.append((line, f'quantidade inválida: {row[1]}'))
+            continue
+        if delta == 0:
+            errors.append((line, 'a quantidade não pode ser zero'))
+            continue
+        lines.append((line, row[0], delta, row[2] if len(row) > 2 and row[2] else None))
+    if errors:
+        raise StockAdjustmentError(errors)
+    return lines
+
+
+def _resolve_products(identifiers):
+    """Lock and return {identifier: product row}; a SKU match wins over an id"""
+    ids = [int(identifier) for identifier in identifiers if identifier.isdigit()]
+    rows = db.session.execute(
+        select(Product.id, Product.sku, Product.name, Product.stock_quantity, Product.min_stock_level)
+        .where(or_(Product.sku.in_(identifiers), Product.id.in_(ids)))
+        .order_by(Product.id)
+        .with_for_update()
+    ).all()
+    by_sku = {row.sku: row for row in rows if row.sku}
+    by_id = {str(row.id): row for row in rows}
+    return {identifier: by_sku.get(identifier) or by_id.get(identifier) for identifier in identifiers}
+
+
+def reconcile_stock_alerts(levels):
+    """
+    Open/resolve stock alerts for {product_id: (stock_quantity, min_stock_level)}.
+
+    One SELECT of the open alerts, one UPDATE resolving the alerts of
+    products back above their minimum and one bulk INSERT for products that
+    fell to or below it. Does not commit.
+    """
+    if not levels:
+        return
+    open_alerts = set(db.session.execute(
+        select(StockAlert.product_id)
+        .where(StockAlert.product_id.in_(list(levels)), StockAlert.is_resolved.is_(False))
+    ).scalars())
+
+    normal = [product_id for product_id, (quantity, minimum) in levels.items()
+              if quantity > minimum and product_id in open_alerts]
+    if normal:
+        db.session.execute(
+            update(StockAlert)
+            .where(StockAlert.product_id.in_(normal), StockAlert.is_resolved.is_(False))
+            .values(is_resolved=True, resolved_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+    new_alerts = [dict(product_id=product_id,
+                       alert_type='low_stock' if quantity > 0 else 'out_of_stock',
+                       message=f'Estoque abaixo do nível mínimo ({minimum})',
+                       is_resolved=False,
+                       created_at=datetime.utcnow())
+                  for product_id, (quantity, minimum) in levels.items()
+                  if quantity <= minimum and product_id not in open_alerts]
+    if new_alerts:
+        db.session.execute(insert(StockAlert), new_alerts)
+
+
+def apply_stock_adjustments(lines, created_by='Admin', default_reason='Ajuste manual'):
+    """
+    Apply many (line, product id or SKU, delta, reason) adjustments at once.
+
+    Everything runs in one transaction: the products are locked in id
+    order, stock is changed with a single UPDATE ... CASE, the movements
+    are bulk-inserted (one per line, in line order) and the stock alerts
+    are reconciled in one pass. Nothing is applied if any line refers to
+    an unknown product, would leave the stock negative or has a reason
+    longer than REASON_MAX_LENGTH; a StockAdjustmentError lists those
+    lines. Returns the movement dicts.
+    """
+    try:
+        products = _resolve_products(list(OrderedDict.fromkeys(str(line[1]) for line in lines)))
+
+        errors, movements = [], []
+        stock = {}
+        now = datetime.utcnow()
+        for line, identifier, delta, reason in lines:
+            product = products[str(identifier)]
+            if product is None:
+                errors.append((line, f'produto {identifier} não encontrado'))
+                continue
+            if len(reason or default_reason) > REASON_MAX_LENGTH:
+                errors.append((line, f'motivo tem mais de {REASON_MAX_LENGTH} caracteres'))
+                continue
+            old_quantity = stock.get(product.id, product.stock_quantity or 0)
+            if old_quantity + delta < 0:
+                errors.append((line, f'{product.name} possui apenas {old_quantity} unidades em estoque'))
+                continue
+            stock[product.id] = old_quantity + delta
+            movements.append(dict(product_id=product.id,
+                                  movement_type='increase' if delta > 0 else 'decrease',
+                                  quantity=abs(delta),
+                                  old_quantity=old_quantity,
+                                  new_quantity=old_quantity + delta,
+                                  reason=reason or default_reason,
+                                  created_at=now,
+                                  created_by=created_by))
+        if errors:
+            raise StockAdjustmentError(errors)
+        if not movements:
+            return []
+
+        # Rows are locked, so the final quantities can be written directly
+        new_quantity = case(stock, value=Product.id)
+        db.session.execute(
+            update(Product)
+            .where(Product.id.in_(list(stock)))
+            .values(stock_quantity=new_quantity, in_stock=new_quantity > 0, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(insert(StockMovement), movements)
+
+        minimums = {row.id: row.min_stock_level or 0 for row in products.values() if row is not None}
+        reconcile_stock_alerts({product_id: (quantity, minimums[product_id])
+                                for product_id, quantity in stock.items()})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Bulk UPDATE bypasses the session hooks that invalidate the catalog
+    from catalog import invalidate_catalog
+    invalidate_catalog()
+
+    logging.info(f"Ajuste de estoque: {len(movements)} movimentações em {len(stock)} produtos")
+    return movements
@@ -0,0 +1,15 @@
+import os
+from app import create_app, init_database
+
+# Storefront-only entry point: catalog, cart and checkout without loading
+# the admin CRUD or Flask-Admin (smaller import, faster cold start)
+app = create_app(['storefront'])
+
+try:
+    init_database()
+except Exception as e:
+    print(f"Warning: Database initialization failed: {e}")
+
+if __name__ == '__main__':
+    debug_mode = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
+    app.run(host='0.0.0.0', port=5000, debug=debug_mode)
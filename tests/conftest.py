@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+# app.py reads its configuration at import time, so the test database has to
+# be in place before anything imports it
+_db_dir = tempfile.mkdtemp(prefix='visage-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault('SESSION_SECRET', 'test-secret')
+os.environ['SERVERLESS_MODE'] = '1'
+os.environ['CACHE_BACKEND'] = 'lru'
+os.environ['CART_BACKEND'] = 'database'
+os.environ['QUERY_PROFILER'] = '0'
+
+import pytest
+from app import app as flask_app, db, create_app
+from models import Product
+
+
+@pytest.fixture(scope='session')
+def app():
+    create_app(['storefront', 'admin_crud', 'flask_admin'])
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    from bootstrap import bootstrap_database
+    bootstrap_database()
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_product(app):
+    """Create a product with the given stock and return its id"""
+    def make(stock_quantity=10, price=10.0, name='Produto de teste'):
+        with app.app_context():
+            product = Product(name=name, price=price, stock_quantity=stock_quantity,
+                              min_stock_level=0, in_stock=stock_quantity > 0)
+            db.session.add(product)
+            db.session.commit()
+            return product.id
+    return make
+
+
+class _DiscardCart:
+    """Cart store stand-in for calling place_order with an in-memory list of lines"""
+
+    def clear(self):
+        pass
+
+
+@pytest.fixture
+def discard_cart():
+    return _DiscardCart()
@@ -0,0 +1,46 @@
+import pytest
+
+
+@pytest.fixture
+def admin_client(client):
+    with client.session_transaction() as s:
+        s['admin_logged_in'] = True
+    return client
+
+
+@pytest.fixture
+def compiles(app, monkeypatch):
+    """Names of the templates Jinja compiles while the test runs (None for inline strings)"""
+    compiled = []
+    compile_template = app.jinja_env.compile
+
+    def counting_compile(source, name=None, filename=None, *args, **kwargs):
+        compiled.append(name)
+        return compile_template(source, name, filename, *args, **kwargs)
+
+    monkeypatch.setattr(app.jinja_env, 'compile', counting_compile)
+    return compiled
+
+
+def test_admin_pages_compile_templates_once(admin_client, make_product, compiles):
+    product_id = make_product(name='Produto admin')
+    pages = ['/admin/', '/admin/products', '/admin/products/new', f'/admin/products/edit/{product_id}',
+             '/admin/orders', '/admin/suppliers', '/admin/suppliers/new']
+
+    for page in pages:
+        assert admin_client.get(page).status_code == 200, page
+    assert None not in compiles  # render_template_string compiles an unnamed template
+
+    # Warm: every template comes from Jinja's cache
+    compiles.clear()
+    for _ in range(3):
+        for page in pages:
+            assert admin_client.get(page).status_code == 200, page
+    assert compiles == []
+
+
+def test_products_list_escapes_product_fields(admin_client, make_product):
+    make_product(name='<b>Negrito</b>')
+    html = admin_client.get('/admin/products').get_data(as_text=True)
+    assert '&lt;b&gt;Negrito&lt;/b&gt;' in html
+    assert '<b>Negrito</b>' not in html
@@ -0,0 +1,37 @@
+import cache as cache_module
+
+
+class _BrokenCache(cache_module.CacheBackend):
+    """Cache backend whose server is down"""
+
+    def get(self, key):
+        raise ConnectionError('cache indisponível')
+
+    def set(self, key, value, ttl=None):
+        raise ConnectionError('cache indisponível')
+
+    def delete(self, key):
+        raise ConnectionError('cache indisponível')
+
+    def incr(self, key):
+        raise ConnectionError('cache indisponível')
+
+
+def test_products_api_survives_cache_outage(app, client, make_product, monkeypatch):
+    make_product(stock_quantity=3, name='Produto API')
+    monkeypatch.setattr(cache_module, '_cache', _BrokenCache())
+    response = client.get('/api/products?in_stock=all&limit=100')
+    assert response.status_code == 200
+    assert 'Produto API' in [item['name'] for item in response.get_json()['items']]
+
+
+def test_catalog_version_survives_lru_eviction(app, monkeypatch):
+    from catalog import get_catalog_version, invalidate_catalog
+    cache = cache_module.LRUCache(max_entries=2)
+    monkeypatch.setattr(cache_module, '_cache', cache)
+    invalidate_catalog()
+    invalidate_catalog()
+    for n in range(10):
+        cache.set(f'catalog:2:page:{n}', n)
+    assert get_catalog_version() == 2
+    assert len(cache._data) == 2
@@ -0,0 +1,79 @@
+import threading
+from types import SimpleNamespace
+from sqlalchemy.exc import OperationalError
+from app import db
+from checkout_service import place_order, CheckoutError
+from models import Order, OrderItem, Product
+
+CHECKOUTS = 16
+
+
+def _is_locked(error):
+    """SQLite refuses a second concurrent writer instead of queueing it"""
+    return 'database is locked' in str(error)
+
+
+def _run_checkouts(app, product_id, quantity, cart):
+    """
+    Run CHECKOUTS simultaneous checkouts of ``quantity`` units.
+
+    Returns (order ids, refused count). Out-of-stock refusals and SQLite
+    lock errors count as refused; any other exception fails the test.
+    """
+    barrier = threading.Barrier(CHECKOUTS)
+    orders, refused, unexpected = [], [], []
+
+    def checkout(n):
+        with app.app_context():
+            lines = [SimpleNamespace(product_id=product_id, quantity=quantity)]
+            barrier.wait()
+            try:
+                order, _ = place_order(lines, f'Cliente {n}', None, cart)
+                orders.append(order.id)
+            except CheckoutError:
+                refused.append(n)
+            except OperationalError as e:
+                if _is_locked(e):
+                    refused.append(n)
+                else:
+                    unexpected.append(e)
+            except Exception as e:
+                unexpected.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=checkout, args=(n,)) for n in range(CHECKOUTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if unexpected:
+        raise unexpected[0]
+    assert len(orders) + len(refused) == CHECKOUTS
+    return orders, len(refused)
+
+
+def test_parallel_checkouts_for_last_units_sell_once(app, make_product, discard_cart):
+    product_id = make_product(stock_quantity=2)
+    orders, _ = _run_checkouts(app, product_id, quantity=2, cart=discard_cart)
+    assert len(orders) == 1, orders
+
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        assert product.stock_quantity == 0
+        assert not product.in_stock
+        assert OrderItem.query.filter_by(product_id=product_id).count() == 1
+        assert db.session.get(Order, orders[0]).whatsapp_sent
+
+
+def test_parallel_checkouts_never_oversell(app, make_product, discard_cart):
+    stock = 5
+    product_id = make_product(stock_quantity=stock)
+    sold, _ = _run_checkouts(app, product_id, quantity=1, cart=discard_cart)
+    assert 1 <= len(sold) <= stock
+
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        assert product.stock_quantity == stock - len(sold)
+        assert OrderItem.query.filter_by(product_id=product_id).count() == len(sold)
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_MODULES = ('admin_crud', 'admin', 'flask_admin')
+
+
+def _loaded_modules(script, **env):
+    """Import ``script`` in a fresh interpreter and return the modules it left in sys.modules"""
+    code = f"import sys, json\n{script}\nprint(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, **env), timeout=60)
+    assert result.returncode == 0, result.stderr
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def test_storefront_entry_skips_admin_code():
+    modules = _loaded_modules('import storefront')
+    assert 'routes' in modules
+    assert not modules.intersection(ADMIN_MODULES)
+
+
+def test_flask_admin_loads_only_when_requested():
+    pytest.importorskip('flask_admin')
+    modules = _loaded_modules('import main', APP_COMPONENTS='storefront,admin_crud,flask_admin')
+    assert set(ADMIN_MODULES) <= modules
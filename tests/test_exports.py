@@ -0,0 +1,33 @@
+import csv
+import io
+import pytest
+from exports import stream_csv, stream_xlsx
+
+HEADER = ('pedido', 'cliente', 'total')
+ROWS = [
+    (1, '=HYPERLINK("http://evil.example","x")', 10.5),
+    (2, '+5511999999999', -3),
+    (3, '@SUM(A1:A2)', 0),
+    (4, '\tTab', 1),
+    (5, 'Nome\x00com\x1fcontrole', 2),
+    (6, 'Maria - Silva', 3),
+]
+
+
+def test_csv_neutralizes_formulas():
+    text = ''.join(stream_csv(HEADER, iter(ROWS))).lstrip('\ufeff')
+    rows = list(csv.reader(io.StringIO(text)))
+    names = [row[1] for row in rows[1:]]
+    assert names[:4] == ["'" + value for _, value, _ in ROWS[:4]]
+    assert names[5] == 'Maria - Silva'
+    assert rows[2][2] == '-3'
+
+
+def test_xlsx_neutralizes_formulas_and_strips_illegal_characters():
+    openpyxl = pytest.importorskip('openpyxl')
+    data = b''.join(stream_xlsx(HEADER, iter(ROWS)))
+    sheet = openpyxl.load_workbook(io.BytesIO(data)).active
+    names = [row[1] for row in sheet.iter_rows(min_row=2, values_only=True)]
+    assert names[:4] == ["'" + value for _, value, _ in ROWS[:4]]
+    assert names[4] == 'Nomecomcontrole'
+    assert sheet.cell(row=3, column=3).value == -3
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+from flask import render_template
+from app import db
+from catalog import _product_snapshot
+from checkout_service import place_order
+from fragment_cache import FragmentCache, get_fragment_cache
+from models import Product
+
+BENCH_PRODUCTS = 1000
+
+
+def _catalog_products(count):
+    return [{
+        'id': n,
+        'name': f'Pomada Modeladora {n}',
+        'description': 'Pomada à base d\'água com fixação forte e brilho médio. ' * 3,
+        'category': 'Pomadas',
+        'price': 20 + n % 50,
+        'stock_quantity': n % 40,
+        'min_stock_level': 5,
+        'updated_at': f'2026-01-01T00:00:{n % 60:02d}.{n:06d}',
+        'image_src': f'/product_image/{n}?size=card',
+    } for n in range(1, count + 1)]
+
+
+def _render(products):
+    return render_template('catalog_products.html', products=products, next_cursor=None)
+
+
+def test_lru_is_bounded_by_bytes():
+    cache = FragmentCache(max_bytes=4096)
+    for n in range(100):
+        cache.set(f'card:{n}', 'x' * 500)
+    assert cache.size <= 4096
+    assert cache.get('card:99') is not None
+    assert cache.get('card:0') is None
+
+
+def test_checkout_moves_updated_at(app, make_product, discard_cart):
+    product_id = make_product(stock_quantity=5)
+    with app.app_context():
+        before = _product_snapshot(db.session.get(Product, product_id))['updated_at']
+        place_order([SimpleNamespace(product_id=product_id, quantity=1)], 'Cliente', None, discard_cart)
+        db.session.expire_all()
+        after = _product_snapshot(db.session.get(Product, product_id))
+    assert after['stock_quantity'] == 4
+    assert after['updated_at'] != before
+
+
+def test_catalog_render_reuses_cached_cards(app):
+    """1000 product cards: every card renders once cold, none warm, only the changed one after an edit"""
+    products = _catalog_products(BENCH_PRODUCTS)
+    with app.test_request_context():
+        cache = get_fragment_cache()
+        max_bytes = cache.max_bytes
+        try:
+            cache.max_bytes = 0
+            uncached = _render(products)
+
+            cache.max_bytes = 16 * 1024 * 1024
+            cache.clear()
+            cold = _render(products)
+            cold_stats = cache.stats()
+
+            cache.hits = cache.misses = 0
+            warm = [_render(products) for _ in range(3)]
+            warm_stats = cache.stats()
+
+            cache.hits = cache.misses = 0
+            products[0] = dict(products[0], updated_at='2026-02-01T00:00:00', stock_quantity=0)
+            changed = _render(products)
+            changed_stats = cache.stats()
+        finally:
+            cache.max_bytes = max_bytes
+            cache.clear()
+
+    assert cold == uncached
+    assert all(html == uncached for html in warm)
+    assert (cold_stats['misses'], cold_stats['hits']) == (BENCH_PRODUCTS, 0)
+    assert (warm_stats['misses'], warm_stats['hits']) == (0, 3 * BENCH_PRODUCTS)
+    assert (changed_stats['misses'], changed_stats['hits']) == (1, BENCH_PRODUCTS - 1)
+    assert changed != uncached
@@ -0,0 +1,18 @@
+import pytest
+from migrations import HOT_QUERIES, explain_hot_queries
+
+
+@pytest.fixture(scope='module')
+def query_plans(app):
+    with app.app_context():
+        return {name: (index, used, plan) for name, index, used, plan in explain_hot_queries()}
+
+
+def test_every_hot_query_is_explained(query_plans):
+    assert {name for name, _, _ in HOT_QUERIES} <= set(query_plans)
+
+
+@pytest.mark.parametrize('name', [name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_its_index(query_plans, name):
+    index, used, plan = query_plans[name]
+    assert used, f'{name} não usa {index}:\n{plan}'
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from app import db
+from checkout_service import place_order
+from models import DailySalesSummary, Order
+from reports import refresh_sales_rollup
+
+DAY = date(2020, 3, 1)
+
+
+@pytest.fixture
+def order_id(app, make_product, discard_cart):
+    """A 2 x R$ 10 order on DAY, already folded into the sales rollup"""
+    product_id = make_product(price=10.0)
+    with app.app_context():
+        order, _ = place_order([SimpleNamespace(product_id=product_id, quantity=2)], 'Cliente', None, discard_cart)
+        order.created_at = datetime.combine(DAY, datetime.min.time())
+        db.session.commit()
+        refresh_sales_rollup(days=[DAY])
+        return order.id
+
+
+def _edit_in_flask_admin(client, order_id, **changes):
+    with client.session_transaction() as s:
+        s['admin_logged_in'] = True
+    form = {'customer_name': 'Cliente', 'customer_phone': '', 'total_amount': '20.0', 'status': 'pending',
+            'whatsapp_sent': 'y', 'created_at': f'{DAY} 00:00:00'}
+    form.update(changes)
+    response = client.post(f'/admin/painel/order/edit/?id={order_id}', data=form)
+    assert response.status_code == 302
+
+
+def _day_revenue(app):
+    with app.app_context():
+        summary = db.session.get(DailySalesSummary, DAY)
+        return summary.revenue if summary else 0
+
+
+def test_flask_admin_order_edits_refresh_the_sales_rollup(app, client, order_id):
+    assert _day_revenue(app) == 20.0
+    with client.session_transaction() as s:
+        s['admin_logged_in'] = True
+    assert client.get(f'/admin/painel/order/edit/?id={order_id}').status_code == 200
+
+    _edit_in_flask_admin(client, order_id, status='cancelled')
+    with app.app_context():
+        assert db.session.get(Order, order_id).status == 'cancelled'
+    assert _day_revenue(app) == 0
+
+    _edit_in_flask_admin(client, order_id, total_amount='15.0')
+    assert _day_revenue(app) == 15.0
@@ -0,0 +1,32 @@
+from datetime import datetime
+import pytest
+from models import Order, Product
+from pagination import decode_cursor, encode_cursor
+
+ORDER_KEY = (Order.created_at, Order.id)
+
+
+def test_cursor_round_trip():
+    values = [datetime(2024, 5, 1, 12, 30), 42]
+    assert decode_cursor(encode_cursor(values), ORDER_KEY) == values
+
+
+@pytest.mark.parametrize('values', [
+    [1, 2],                          # number where a timestamp is expected
+    ['2024-05-01T12:30:00', '42'],   # string id
+    ['2024-05-01T12:30:00', True],
+    ['not a date', 1],
+    ['2024-05-01T12:30:00', None],   # ids are never NULL
+    [1],
+])
+def test_tampered_cursor_is_rejected(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), ORDER_KEY)
+
+
+def test_tampered_cursor_restarts_listing(app, client):
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    assert client.get('/admin/orders?after=WzEsMl0').status_code == 200
+    assert client.get(f'/api/products?after={encode_cursor(["1"])}').status_code == 200
+    assert decode_cursor(encode_cursor(['Pomada', 3]), (Product.name, Product.id)) == ['Pomada', 3]
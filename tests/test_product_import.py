@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+from app import db
+from checkout_service import place_order
+from models import Product
+from product_import import import_products
+
+
+def _import(csv_text):
+    return import_products('produtos.csv', csv_text.encode('utf-8'))
+
+
+def test_import_creates_then_updates_by_sku(app):
+    with app.app_context():
+        result = _import('sku;name;price;stock_quantity\nIMP-001;Pomada Teste;29,90;10\n')
+        assert (result['created'], result['updated'], result['errors']) == (1, 0, [])
+
+        result = _import('sku;price\nIMP-001;31,50\n')
+        assert (result['created'], result['updated'], result['errors']) == (0, 1, [])
+        product = Product.query.filter_by(sku='IMP-001').one()
+        assert (product.name, product.price, product.stock_quantity) == ('Pomada Teste', 31.5, 10)
+
+
+def test_blank_stock_cell_keeps_stock_sold_since_last_import(app, discard_cart):
+    with app.app_context():
+        _import('sku;name;price;stock_quantity\nIMP-002;Cera Teste;20;8\n')
+        product_id = Product.query.filter_by(sku='IMP-002').one().id
+        place_order([SimpleNamespace(product_id=product_id, quantity=3)], 'Cliente', None, discard_cart)
+
+        result = _import('sku;name;stock_quantity\nIMP-002;Cera Teste Nova;\n')
+        assert result['errors'] == []
+        assert result['movements'] == 0
+        db.session.expire_all()
+        product = db.session.get(Product, product_id)
+        assert (product.name, product.stock_quantity) == ('Cera Teste Nova', 5)
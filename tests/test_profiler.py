@@ -0,0 +1,18 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import profiler
+
+
+def test_disabled_profiler_adds_no_query_hooks(app, client):
+    assert not app.config['QUERY_PROFILER']
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    response = client.get('/admin/profiler')
+    assert response.status_code == 200
+    assert 'QUERY_PROFILER=1' in response.get_data(as_text=True)
+
+    profiler.init_profiler(app)
+    assert not profiler.is_profiler_enabled()
+    assert not event.contains(Engine, 'before_cursor_execute', profiler._before_cursor_execute)
+    assert not event.contains(Engine, 'after_cursor_execute', profiler._after_cursor_execute)
+    assert 'Server-Timing' not in client.get('/').headers
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from catalog import invalidate_catalog
+
+CART_SIZES = (1, 20)
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def cart_client(app, client, make_product):
+    """Client whose cart holds ``size`` different products"""
+    def fill(size):
+        for n in range(size):
+            product_id = make_product(stock_quantity=50, name=f'Produto {n}')
+            response = client.post(f'/add_to_cart/{product_id}', data={'quantity': 2})
+            assert response.status_code == 302
+        return client
+    return fill
+
+
+def _query_counts(app, cart_client, method, path, data=None):
+    counts = {}
+    for size in CART_SIZES:
+        client = cart_client(size)
+        invalidate_catalog()
+        with count_queries(app) as statements:
+            response = client.open(path, method=method, data=data)
+        assert response.status_code in (200, 302)
+        counts[size] = len(statements)
+        client.get('/clear_cart')
+    return counts
+
+
+@pytest.mark.parametrize('method, path, data, limit', [
+    ('GET', '/', None, 1),
+    ('GET', '/cart', None, 1),
+    ('GET', '/checkout', None, 1),
+    ('POST', '/checkout', {'customer_name': 'Cliente Teste', 'customer_phone': '19999999999'}, 7),
+])
+def test_query_count_does_not_grow_with_cart(app, cart_client, method, path, data, limit):
+    counts = _query_counts(app, cart_client, method, path, data)
+    assert counts[CART_SIZES[0]] == counts[CART_SIZES[-1]], counts
+    assert counts[CART_SIZES[-1]] <= limit, counts
@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import insert
+from app import db
+from models import Product
+from search import search_products
+
+
+@pytest.fixture
+def search(app):
+    def run(query, **kwargs):
+        with app.app_context():
+            return search_products(query, **kwargs)
+    return run
+
+
+def _names(result):
+    return [item['name'] for item in result['items']]
+
+
+def test_prefix_match(search, make_product):
+    make_product(name='Pomada Zirconita Modeladora')
+    result = search('zircon')
+    assert result['backend'] == 'memory'
+    assert 'Pomada Zirconita Modeladora' in _names(result)
+    assert '<mark>Zirconita</mark>' in result['items'][0]['highlight']['name']
+
+
+def test_typo_matches(search, make_product):
+    make_product(name='Pomada Quartzolita')
+    assert 'Pomada Quartzolita' in _names(search('pomda quartzolita'))
+
+
+def test_name_matches_rank_above_description(app, search, make_product):
+    make_product(name='Cera Ambarina')
+    with app.app_context():
+        db.session.add(Product(name='Shampoo Neutro', description='Combina com cera ambarina',
+                               price=10.0, stock_quantity=5, min_stock_level=0, in_stock=True))
+        db.session.commit()
+    items = search('ambarina')['items']
+    assert [item['name'] for item in items] == ['Cera Ambarina', 'Shampoo Neutro']
+    assert items[0]['rank'] > items[1]['rank']
+
+
+def test_out_of_stock_only_with_in_stock_false(search, make_product):
+    make_product(stock_quantity=0, name='Balm Esgotadissimo')
+    assert 'Balm Esgotadissimo' not in _names(search('esgotadissimo'))
+    assert 'Balm Esgotadissimo' in _names(search('esgotadissimo', in_stock=False))
+
+
+def test_highlight_escapes_html(search, make_product):
+    make_product(name='Gel <script>alert(1)</script> Fixador')
+    item = search('fixador')['items'][0]
+    assert '<script>' not in item['highlight']['name']
+    assert '&lt;script&gt;' in item['highlight']['name']
+    assert '<mark>Fixador</mark>' in item['highlight']['name']
+
+
+def test_index_picks_up_changes_from_other_workers_after_ttl(app, search, monkeypatch):
+    search('qualquer')  # build the index
+
+    # A Core insert bumps no catalog version, like a write made by another worker
+    with app.app_context():
+        db.session.execute(insert(Product), [{'name': 'Tonico Outroworker', 'price': 10.0, 'stock_quantity': 5,
+                                              'min_stock_level': 0, 'in_stock': True}])
+        db.session.commit()
+
+    monkeypatch.setitem(app.config, 'SEARCH_INDEX_TTL', 3600)
+    assert search('outroworker')['items'] == []
+    monkeypatch.setitem(app.config, 'SEARCH_INDEX_TTL', 0)
+    assert _names(search('outroworker')) == ['Tonico Outroworker']
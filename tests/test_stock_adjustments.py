@@ -0,0 +1,34 @@
+from app import db
+from models import Product
+from stock_service import REASON_MAX_LENGTH
+
+
+def _admin(client):
+    with client.session_transaction() as session:
+        session['admin_logged_in'] = True
+    return client
+
+
+def test_api_applies_adjustments(app, client, make_product):
+    product_id = make_product(stock_quantity=4)
+    response = _admin(client).post('/admin/api/stock-adjustments', json={'adjustments': [
+        {'product_id': product_id, 'delta': 6, 'reason': 'Remessa NF 1234'},
+        {'product_id': product_id, 'delta': -2},
+    ]})
+    assert response.status_code == 200
+    assert response.get_json()['applied'] == 2
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock_quantity == 8
+
+
+def test_api_rejects_long_reason(app, client, make_product):
+    product_id = make_product(stock_quantity=4)
+    response = _admin(client).post('/admin/api/stock-adjustments', json={'adjustments': [
+        {'product_id': product_id, 'delta': 1, 'reason': 'x' * REASON_MAX_LENGTH},
+        {'product_id': product_id, 'delta': 1, 'reason': 'x' * (REASON_MAX_LENGTH + 1)},
+        {'product_id': product_id, 'delta': 1, 'reason': 12},
+    ]})
+    assert response.status_code == 400
+    assert [error['line'] for error in response.get_json()['errors']] == [2, 3]
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock_quantity == 4